@@ -6,20 +6,17 @@ from fastapi import Depends, HTTPException, status
 from fastapi import Query
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import decode_token
-from app.db.session import get_db_session
+from app.db.session import get_sessionmaker
 from app.models.user import User
+from app.services.user_cache import AuthUser, get_user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db_session),
-) -> User:
+def _token_claims(token: str) -> tuple[uuid.UUID, int]:
     try:
         payload = decode_token(token)
     except ValueError:
@@ -34,45 +31,57 @@ async def get_current_user(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-
+    # Tokens issued before token epochs existed carry none and count as epoch 0.
+    epoch = payload.get("epoch", 0)
+    if not isinstance(epoch, int):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return user_id, epoch
+
+
+async def _load_user(user_id: uuid.UUID) -> AuthUser | None:
+    async with get_sessionmaker()() as db:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+    return AuthUser.from_user(user) if user is not None else None
+
+
+async def _authenticate(token: str) -> AuthUser:
+    """
+    Verify the token, then resolve its user from the in-process cache; only a miss (or a token
+    newer than the cached epoch) queries `users`, in its own short-lived session, so
+    authentication holds no pooled connection.
+    """
+    user_id, epoch = _token_claims(token)
+    cache = get_user_cache()
+    user = cache.get(user_id) if cache is not None else None
+    if user is None or user.token_epoch < epoch:
+        user = await _load_user(user_id)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        if cache is not None:
+            cache.put(user)
+
+    if epoch != user.token_epoch:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked")
     return user
 
 
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> AuthUser:
+    return await _authenticate(token)
+
+
 async def get_current_user_flexible(
     token_header: str | None = Depends(oauth2_scheme_optional),
     token_query: str | None = Query(default=None, alias="token"),
-    db: AsyncSession = Depends(get_db_session),
-) -> User:
+) -> AuthUser:
+    """Header or `?token=` auth for SSE (EventSource cannot set headers)."""
     token = token_header or token_query
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    try:
-        payload = decode_token(token)
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-    subject = payload.get("sub")
-    if not subject:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-    try:
-        user_id = uuid.UUID(str(subject))
-    except ValueError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-
-    return user
+    return await _authenticate(token)
 
 
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: AuthUser = Depends(get_current_user)) -> AuthUser:
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
     return current_user
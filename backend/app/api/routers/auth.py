@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
@@ -12,6 +12,7 @@ from app.db.session import get_db_session
 from app.models.user import User
 from app.schemas.auth import LoginRequest, RegisterRequest, RegisterResponse, TokenResponse
 from app.schemas.user import UserResponse
+from app.services.user_cache import AuthUser, invalidate_user
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -46,10 +47,24 @@ async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db_session
     user.last_login_at = datetime.now(timezone.utc)
     await db.commit()
 
-    token = create_access_token(subject=str(user.id), extra={"username": user.username, "role": user.role})
+    token = create_access_token(
+        subject=str(user.id), extra={"username": user.username, "role": user.role, "epoch": user.token_epoch}
+    )
     return TokenResponse(access_token=token)
 
 
 @router.get("/me", response_model=UserResponse)
-async def me(current_user: User = Depends(get_current_user)) -> UserResponse:
+async def me(current_user: AuthUser = Depends(get_current_user)) -> UserResponse:
     return UserResponse.model_validate(current_user)
+
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all(
+    current_user: AuthUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db_session),
+) -> None:
+    """Revoke every token issued to the caller so far, this one included."""
+    await db.execute(update(User).where(User.id == current_user.id).values(token_epoch=User.token_epoch + 1))
+    await db.commit()
+    # Other workers keep accepting old tokens until their cached entry expires.
+    invalidate_user(current_user.id)
@@ -9,119 +9,141 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import StreamingResponse
 import httpx
 from pydantic import ValidationError
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_current_user_flexible
 from app.core.config import get_settings
-from app.db.session import get_db_session
-from app.models.message import Message
+from app.db.session import get_db_session, get_sessionmaker
 from app.models.qa_run import QARun
-from app.models.session import Session
-from app.models.user import User
 from app.schemas.chat import ChatAskRequest, ChatAskResponse, SafetyInfo
-from app.rag.retriever import build_context, retrieve_chunks
+from app.rag.filters import make_filter
+from app.rag.retriever import RetrievedChunk
+from app.services.answer_cache import AnswerCache, CachedAnswer, get_answer_cache
+from app.services.chat_pipeline import (
+    SessionNotFound,
+    StageTimer,
+    build_citations,
+    build_prompt,
+    discard_question,
+    prepare_turn,
+)
+from app.services.chat_writer import AnswerWrite, record_answer
 from app.services.llm_client import get_llm_client
+from app.services.user_cache import AuthUser
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
 _DISCLAIMER = "仅供参考，不能替代专业医疗建议。"
+_PROMPT_VERSION = "v1"
+_REPLAY_CHUNK_CHARS = 24
+
+
+def _answer_cache_signature(retrieved: list[RetrievedChunk]) -> tuple:
+    settings = get_settings()
+    return AnswerCache.signature(
+        chunk_ids=[c.chunk_id for c in retrieved],
+        prompt_version=_PROMPT_VERSION,
+        llm_key=f"{settings.llm_provider}:{settings.llm_model}",
+    )
+
+
+def _assistant_message_row(session_id: uuid.UUID, answer: str) -> dict:
+    # created_at is taken now rather than at the (possibly deferred) insert, so the answer
+    # always sorts before the session's next question.
+    return {
+        "id": uuid.uuid4(),
+        "session_id": session_id,
+        "role": "assistant",
+        "content": answer,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def _retrieval_kwargs(payload: ChatAskRequest) -> dict:
+    kwargs = payload.retrieval.model_dump(exclude_none=True) if payload.retrieval else {}
+    if payload.filters is not None:
+        kwargs["filters"] = make_filter(**payload.filters.model_dump())
+    return kwargs
 
 
 @router.post("/ask", response_model=ChatAskResponse)
 async def ask(
     payload: ChatAskRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> ChatAskResponse:
     settings = get_settings()
     now = datetime.now(timezone.utc)
-
-    if payload.session_id is None:
-        title = payload.question.strip()
-        title = title[:50] if title else None
-        session = Session(user_id=current_user.id, title=title)
-        db.add(session)
-        await db.flush()
-    else:
-        session_result = await db.execute(
-            select(Session).where(Session.id == payload.session_id, Session.user_id == current_user.id)
-        )
-        session = session_result.scalar_one_or_none()
-        if session is None:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    timer = StageTimer()
 
     try:
-        retrieved = await retrieve_chunks(db, query=payload.question, top_k=settings.rag_top_k)
+        turn = await prepare_turn(
+            db, user_id=current_user.id, payload=payload, retrieval=_retrieval_kwargs(payload), timer=timer
+        )
+    except SessionNotFound as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found") from exc
     except (RuntimeError, httpx.HTTPError) as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"RAG retrieval failed: {exc}") from exc
-    context = build_context(retrieved) if retrieved else None
+    session, user_message, query_vec = turn.session, turn.user_message, turn.query_vector
 
-    user_message = Message(
-        session_id=session.id,
-        role="user",
-        content=payload.question,
-        client_msg_id=payload.client_msg_id,
-    )
-    db.add(user_message)
-    await db.flush()
+    answer_cache = get_answer_cache()
+    cache_signature = _answer_cache_signature(turn.retrieved) if answer_cache else None
+    cached = answer_cache.lookup(query_vec, signature=cache_signature) if answer_cache else None
 
     start = time.perf_counter()
-    llm = get_llm_client()
-    try:
-        llm_result = await llm.generate(question=payload.question, context=context)
-    except (RuntimeError, httpx.HTTPError) as exc:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"LLM failed: {exc}") from exc
+    if cached is not None:
+        answer = cached.answer
+    else:
+        llm = get_llm_client()
+        try:
+            with timer.stage("llm"):
+                llm_result = await llm.generate(question=payload.question, context=turn.context)
+        except (RuntimeError, httpx.HTTPError) as exc:
+            await discard_question(session, user_message, session_created=turn.session_created)
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"LLM failed: {exc}") from exc
+        answer = llm_result.text
     latency_ms = int((time.perf_counter() - start) * 1000)
 
-    assistant_message = Message(
-        session_id=session.id,
-        role="assistant",
-        content=llm_result.text,
-    )
-    db.add(assistant_message)
-    await db.flush()
-
-    citations = [
-        {
-            "chunk_id": str(c.chunk_id),
-            "document": {"title": c.title, "version": c.version, "source_url": c.source_url},
-            "snippet": c.text[:240],
-            "score": c.score,
-        }
-        for c in retrieved
-    ]
-
-    prompt = None
-    if context:
-        prompt = (
-            "你是医疗问答助手。回答需谨慎、避免诊断与处方，必要时建议就医。\n"
-            f"用户问题：{payload.question}\n\n"
-            f"参考资料（带引用编号）：\n{context}\n"
-        )
+    citations = [dict(c) for c in cached.citations] if cached is not None else build_citations(turn.retrieved)
 
-    qa_run = QARun(
-        session_id=session.id,
-        user_message_id=user_message.id,
-        assistant_message_id=assistant_message.id,
-        llm_provider=settings.llm_provider,
-        llm_model=settings.llm_model or None,
-        prompt_version="v1",
-        prompt=prompt,
-        answer=llm_result.text,
-        citations=citations,
-        latency_ms=latency_ms,
-        safety_flags={"disclaimer": _DISCLAIMER, "triage": "normal"},
+    assistant_message = _assistant_message_row(session.id, answer)
+    qa_run_id = uuid.uuid4()
+    timer.mark("total")
+    await record_answer(
+        AnswerWrite(
+            session_id=session.id,
+            updated_at=now,
+            assistant_message=assistant_message,
+            qa_run={
+                "id": qa_run_id,
+                "session_id": session.id,
+                "user_message_id": user_message.id,
+                "assistant_message_id": assistant_message["id"],
+                "llm_provider": settings.llm_provider,
+                "llm_model": settings.llm_model or None,
+                "prompt_version": _PROMPT_VERSION,
+                "prompt": build_prompt(payload.question, turn.context),
+                "answer": answer,
+                "citations": citations,
+                "latency_ms": latency_ms,
+                "cache_hit": cached is not None,
+                "safety_flags": {"disclaimer": _DISCLAIMER, "triage": "normal"},
+                "timings": timer.timings,
+            },
+        )
     )
-    db.add(qa_run)
 
-    session.updated_at = now
-    await db.commit()
+    if answer_cache is not None and cached is None:
+        answer_cache.store(
+            query_vec,
+            signature=cache_signature,
+            answer=CachedAnswer(qa_run_id=qa_run_id, answer=answer, citations=citations),
+        )
 
     return ChatAskResponse(
         session_id=session.id,
-        qa_run_id=qa_run.id,
-        answer=llm_result.text,
+        qa_run_id=qa_run_id,
+        answer=answer,
         citations=citations,
         safety=SafetyInfo(disclaimer=_DISCLAIMER, triage="normal"),
     )
@@ -159,9 +181,12 @@ async def _read_json_body(request: Request) -> dict:
 @router.api_route("/stream", methods=["GET", "POST"])
 async def stream(
     request: Request,
-    current_user: User = Depends(get_current_user_flexible),
-    db: AsyncSession = Depends(get_db_session),
+    current_user: AuthUser = Depends(get_current_user_flexible),
 ):
+    """
+    SSE variant of /ask. Each persistence step opens its own short-lived session, so no
+    pooled connection is held while the LLM streams tokens.
+    """
     if request.method == "GET":
         question = (request.query_params.get("question") or "").strip()
         session_id_raw = request.query_params.get("session_id")
@@ -180,56 +205,28 @@ async def stream(
 
         now = datetime.now(timezone.utc)
         settings = get_settings()
-
-        if payload.session_id is None:
-            title = payload.question.strip()
-            title = title[:50] if title else None
-            session = Session(user_id=current_user.id, title=title)
-            db.add(session)
-            await db.flush()
-        else:
-            session_result = await db.execute(
-                select(Session).where(Session.id == payload.session_id, Session.user_id == current_user.id)
-            )
-            session = session_result.scalar_one_or_none()
-            if session is None:
-                yield _sse("error", {"message": "Session not found"})
-                return
-
-        user_message = Message(
-            session_id=session.id,
-            role="user",
-            content=payload.question,
-            client_msg_id=payload.client_msg_id,
-        )
-        db.add(user_message)
-        await db.flush()
+        timer = StageTimer()
 
         yield _sse("meta", {"stage": "retrieving"})
         try:
-            retrieved = await retrieve_chunks(db, query=payload.question, top_k=settings.rag_top_k)
+            async with get_sessionmaker()() as db:
+                turn = await prepare_turn(
+                    db, user_id=current_user.id, payload=payload, retrieval=_retrieval_kwargs(payload), timer=timer
+                )
+        except SessionNotFound:
+            yield _sse("error", {"message": "Session not found"})
+            return
         except (RuntimeError, httpx.HTTPError) as exc:
             yield _sse("error", {"message": f"RAG retrieval failed: {exc}"})
             return
-        context = build_context(retrieved) if retrieved else None
-
-        citations = [
-            {
-                "chunk_id": str(c.chunk_id),
-                "document": {"title": c.title, "version": c.version, "source_url": c.source_url},
-                "snippet": c.text[:240],
-                "score": c.score,
-            }
-            for c in retrieved
-        ]
-
-        prompt = None
-        if context:
-            prompt = (
-                "你是医疗问答助手。回答需谨慎、避免诊断与处方，必要时建议就医。\n"
-                f"用户问题：{payload.question}\n\n"
-                f"参考资料（带引用编号）：\n{context}\n"
-            )
+        session, user_message, query_vec, context = turn.session, turn.user_message, turn.query_vector, turn.context
+
+        answer_cache = get_answer_cache()
+        cache_signature = _answer_cache_signature(turn.retrieved) if answer_cache else None
+        cached = answer_cache.lookup(query_vec, signature=cache_signature) if answer_cache else None
+
+        citations = [dict(c) for c in cached.citations] if cached is not None else build_citations(turn.retrieved)
+        prompt = build_prompt(payload.question, context)
 
         qa_run = QARun(
             session_id=session.id,
@@ -237,46 +234,73 @@ async def stream(
             assistant_message_id=None,
             llm_provider=settings.llm_provider,
             llm_model=settings.llm_model or None,
-            prompt_version="v1",
+            prompt_version=_PROMPT_VERSION,
             prompt=prompt,
             citations=citations,
+            cache_hit=cached is not None,
             safety_flags={"disclaimer": _DISCLAIMER, "triage": "normal"},
         )
-        db.add(qa_run)
-        await db.flush()
-
-        await db.commit()
+        with timer.stage("persist_run"):
+            async with get_sessionmaker()() as db:
+                db.add(qa_run)
+                await db.commit()
 
         yield _sse("meta", {"stage": "generating", "session_id": str(session.id), "qa_run_id": str(qa_run.id)})
 
-        llm = get_llm_client()
         start = time.perf_counter()
         answer_parts: list[str] = []
 
-        try:
-            async for delta in llm.stream(question=payload.question, context=context):
-                if await request.is_disconnected():
-                    return
+        if cached is not None:
+            text = cached.answer
+            timer.mark("first_token")
+            for i in range(0, len(text), _REPLAY_CHUNK_CHARS):
+                delta = text[i : i + _REPLAY_CHUNK_CHARS]
                 answer_parts.append(delta)
                 yield _sse("token", {"delta": delta})
-        except (RuntimeError, httpx.HTTPError) as exc:
-            yield _sse("error", {"message": f"LLM stream failed: {exc}"})
-            return
-        finally:
             latency_ms = int((time.perf_counter() - start) * 1000)
+        else:
+            llm = get_llm_client()
+            try:
+                async for delta in llm.stream(question=payload.question, context=context):
+                    if await request.is_disconnected():
+                        return
+                    if not answer_parts:
+                        timer.mark("first_token")
+                    answer_parts.append(delta)
+                    yield _sse("token", {"delta": delta})
+            except (RuntimeError, httpx.HTTPError) as exc:
+                yield _sse("error", {"message": f"LLM stream failed: {exc}"})
+                return
+            finally:
+                latency_ms = int((time.perf_counter() - start) * 1000)
+                timer.timings["llm"] = latency_ms
 
         answer = "".join(answer_parts)
 
-        assistant_message = Message(session_id=session.id, role="assistant", content=answer)
-        db.add(assistant_message)
-        await db.flush()
-
-        qa_run.assistant_message_id = assistant_message.id
-        qa_run.answer = answer
-        qa_run.latency_ms = latency_ms
+        assistant_message = _assistant_message_row(session.id, answer)
+        timer.mark("total")
+        await record_answer(
+            AnswerWrite(
+                session_id=session.id,
+                updated_at=now,
+                assistant_message=assistant_message,
+                qa_run={
+                    "id": qa_run.id,
+                    "assistant_message_id": assistant_message["id"],
+                    "answer": answer,
+                    "latency_ms": latency_ms,
+                    "timings": timer.timings,
+                },
+                qa_run_exists=True,
+            )
+        )
 
-        session.updated_at = now
-        await db.commit()
+        if answer_cache is not None and cached is None and answer:
+            answer_cache.store(
+                query_vec,
+                signature=cache_signature,
+                answer=CachedAnswer(qa_run_id=qa_run.id, answer=answer, citations=citations),
+            )
 
         done = ChatAskResponse(
             session_id=session.id,
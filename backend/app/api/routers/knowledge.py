@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import hashlib
+import json
 import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 import httpx
-from qdrant_client.http import models as qm
-from sqlalchemy import select
+from pydantic import ValidationError
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import require_admin
@@ -14,155 +17,254 @@ from app.core.config import get_settings
 from app.db.session import get_db_session
 from app.models.chunk import Chunk
 from app.models.document import Document
-from app.rag.chunking import chunk_text
-from app.rag.embeddings import embed_text, embed_texts
-from app.rag.qdrant_store import ensure_collection, get_qdrant_client
+from app.models.ingestion_job import IngestionJob
+from app.rag.chunk_cache import get_chunk_cache, invalidate_document_chunks
+from app.rag.embedding_cache import get_embedding_cache
+from app.rag.filters import make_filter
+from app.rag.lexical import get_lexical_index, notify_lexical_index
+from app.rag.qdrant_store import delete_document_points
+from app.rag.retriever import retrieve_chunks
 from app.schemas.knowledge import (
+    CacheStats,
+    IngestionJobResponse,
+    KnowledgeBulkImportResponse,
+    KnowledgeCacheStatsResponse,
     KnowledgeImportRequest,
-    KnowledgeImportResponse,
     KnowledgeSearchItem,
     KnowledgeSearchResponse,
 )
+from app.services.answer_cache import get_answer_cache, invalidate_answer_cache
+from app.services.bulk_import import BulkImporter
+from app.services.cpu_pool import compute_checksum
+from app.services.ingestion import ACTIVE_STATUSES, notify_ingestion_workers
+from app.services.user_cache import AuthUser, get_user_cache
 
 router = APIRouter(prefix="/api/knowledge", tags=["knowledge"])
 
 
-@router.post("/import", response_model=KnowledgeImportResponse, dependencies=[Depends(require_admin)])
-async def import_knowledge(payload: KnowledgeImportRequest, db: AsyncSession = Depends(get_db_session)) -> KnowledgeImportResponse:
-    settings = get_settings()
+def _job_response(job: IngestionJob) -> IngestionJobResponse:
+    resp = IngestionJobResponse.model_validate(job)
+    if job.started_at and job.processed_chunks:
+        elapsed = ((job.finished_at or datetime.now(timezone.utc)) - job.started_at).total_seconds()
+        if elapsed > 0:
+            resp.chunks_per_sec = round(job.processed_chunks / elapsed, 2)
+    return resp
+
+
+@router.post("/import", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_knowledge(
+    payload: KnowledgeImportRequest,
+    current_user: AuthUser = Depends(require_admin),
+    db: AsyncSession = Depends(get_db_session),
+) -> IngestionJobResponse:
     raw = payload.raw_text.strip()
     if not raw:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="raw_text is empty")
 
-    checksum = hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()
+    checksum = await compute_checksum(raw)
     exists = await db.execute(select(Document).where(Document.checksum == checksum))
     if exists.scalar_one_or_none() is not None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Document already imported")
+    pending = await db.execute(
+        select(IngestionJob.id).where(IngestionJob.checksum == checksum, IngestionJob.status.in_(ACTIVE_STATUSES))
+    )
+    if pending.first() is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Document import already in progress")
 
-    doc = Document(
+    job = IngestionJob(
         source_type=payload.source_type,
         source_url=payload.source_url,
         title=payload.title.strip(),
         version=payload.version,
         checksum=checksum,
+        raw_text=raw,
+        created_by=current_user.id,
+        status="queued",
+        stage="queued",
+        processed_chunks=0,
+        attempts=0,
     )
-    db.add(doc)
-    await db.flush()
-
-    items = chunk_text(raw)
-    if not items:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No chunks generated")
-
-    chunks: list[Chunk] = []
-    for item in items:
-        c = Chunk(document_id=doc.id, chunk_index=item.index, text=item.text, token_count=None, section=None, meta=None)
-        db.add(c)
-        chunks.append(c)
-    await db.flush()
+    db.add(job)
     await db.commit()
+    await db.refresh(job)
 
-    client = get_qdrant_client()
-    ensure_collection(client)
-
-    batch_size = max(1, int(settings.embedding_batch_size or 1))
-    points: list[qm.PointStruct] = []
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i : i + batch_size]
-        try:
-            vectors = await embed_texts([c.text for c in batch], dim=settings.embedding_dim)
-        except (RuntimeError, httpx.HTTPError) as exc:
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Embedding failed: {exc}") from exc
-        for c, vec in zip(batch, vectors, strict=True):
-            points.append(
-                qm.PointStruct(
-                    id=str(c.id),
-                    vector=vec,
-                    payload={
-                        "chunk_id": str(c.id),
-                        "document_id": str(doc.id),
-                        "title": doc.title,
-                        "version": doc.version,
-                        "source_url": doc.source_url,
-                        "chunk_index": c.chunk_index,
-                    },
-                )
-            )
+    notify_ingestion_workers()
+    return _job_response(job)
 
-    client.upsert(collection_name=settings.qdrant_collection, points=points)
 
-    return KnowledgeImportResponse(document_id=doc.id, chunk_count=len(chunks))
+async def _iter_lines(request: Request, *, max_line_bytes: int) -> AsyncIterator[tuple[int, bytes]]:
+    buf = bytearray()
+    line_no = 0
+    async for part in request.stream():
+        buf.extend(part)
+        start = 0
+        while (nl := buf.find(b"\n", start)) != -1:
+            line_no += 1
+            yield line_no, bytes(buf[start:nl])
+            start = nl + 1
+        del buf[:start]
+        if len(buf) > max_line_bytes:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Line {line_no + 1} too long")
+    if buf:
+        yield line_no + 1, bytes(buf)
+
+
+@router.post("/import/bulk", response_model=KnowledgeBulkImportResponse)
+async def bulk_import_knowledge(
+    request: Request,
+    current_user: AuthUser = Depends(require_admin),
+    db: AsyncSession = Depends(get_db_session),
+) -> KnowledgeBulkImportResponse:
+    """
+    Import a streamed NDJSON body, one `KnowledgeImportRequest` object per line. Documents
+    whose indexing fails are left to the ingestion workers as queued jobs.
+    """
+    settings = get_settings()
+    importer = BulkImporter(
+        db,
+        batch_size=settings.bulk_import_batch_size,
+        max_errors=settings.bulk_import_max_errors,
+        created_by=current_user.id,
+    )
+    try:
+        async for line_no, line in _iter_lines(request, max_line_bytes=settings.bulk_import_max_line_bytes):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                doc = KnowledgeImportRequest.model_validate(json.loads(line))
+            except (ValueError, ValidationError) as exc:
+                importer.record_error(line_no, str(exc).splitlines()[0])
+                continue
+            await importer.add(line_no, doc)
+        stats = await importer.finish()
+    except (RuntimeError, httpx.HTTPError) as exc:
+        await importer.abort()
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Indexing failed: {exc}") from exc
+    except BaseException:
+        await importer.abort()
+        raise
+    finally:
+        if importer.stats.imported:
+            invalidate_answer_cache()
+            notify_lexical_index()
+
+    return KnowledgeBulkImportResponse(
+        received=stats.received,
+        imported=stats.imported,
+        skipped_duplicates=stats.skipped_duplicates,
+        failed=stats.failed,
+        chunk_count=stats.chunk_count,
+        errors=stats.errors,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse, dependencies=[Depends(require_admin)])
+async def get_ingestion_job(job_id: uuid.UUID, db: AsyncSession = Depends(get_db_session)) -> IngestionJobResponse:
+    job = await db.get(IngestionJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return _job_response(job)
+
+
+@router.delete(
+    "/documents/{document_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(require_admin)],
+)
+async def delete_document(document_id: uuid.UUID, db: AsyncSession = Depends(get_db_session)) -> None:
+    doc = await db.get(Document, document_id)
+    if doc is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    active = await db.execute(
+        select(IngestionJob.id).where(
+            IngestionJob.document_id == document_id, IngestionJob.status.in_(ACTIVE_STATUSES)
+        )
+    )
+    if active.first() is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Document import still in progress")
+
+    await db.execute(update(IngestionJob).where(IngestionJob.document_id == document_id).values(document_id=None))
+    await db.execute(delete(Chunk).where(Chunk.document_id == document_id))
+    await db.execute(delete(Document).where(Document.id == document_id))
+
+    # Points go first: if Qdrant fails the transaction is rolled back and nothing changed.
+    try:
+        await delete_document_points(str(document_id))
+    except Exception as exc:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Qdrant delete failed: {exc}") from exc
+    await db.commit()
+
+    invalidate_document_chunks(document_id)
+    index = get_lexical_index()
+    if index is not None:
+        # Other workers drop the document on their next lexical refresh.
+        index.remove_documents([document_id])
+    invalidate_answer_cache()
 
 
 @router.get("/search", response_model=KnowledgeSearchResponse, dependencies=[Depends(require_admin)])
 async def search_knowledge(
     q: str = Query(min_length=1, max_length=4000),
     top_k: int = Query(default=10, ge=1, le=50),
+    mode: Literal["vector", "hybrid"] | None = Query(default=None),
+    vector_weight: float | None = Query(default=None, ge=0),
+    lexical_weight: float | None = Query(default=None, ge=0),
+    document_id: list[uuid.UUID] | None = Query(default=None, max_length=100),
+    version: list[str] | None = Query(default=None, max_length=50),
+    source_type: list[str] | None = Query(default=None, max_length=20),
+    created_from: datetime | None = Query(default=None),
+    created_to: datetime | None = Query(default=None),
     db: AsyncSession = Depends(get_db_session),
 ) -> KnowledgeSearchResponse:
-    settings = get_settings()
-    client = get_qdrant_client()
-    ensure_collection(client)
-
+    filters = make_filter(
+        document_ids=document_id,
+        versions=version,
+        source_types=source_type,
+        created_from=created_from,
+        created_to=created_to,
+    )
     try:
-        query_vec = await embed_text(q, dim=settings.embedding_dim)
+        retrieved = await retrieve_chunks(
+            db,
+            query=q,
+            top_k=top_k,
+            mode=mode,
+            vector_weight=vector_weight,
+            lexical_weight=lexical_weight,
+            filters=filters,
+        )
     except (RuntimeError, httpx.HTTPError) as exc:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Embedding failed: {exc}") from exc
-    try:
-        if hasattr(client, "query_points"):
-            resp = client.query_points(
-                collection_name=settings.qdrant_collection,
-                query=query_vec,
-                limit=top_k,
-                with_payload=True,
-                with_vectors=False,
-            )
-            hits = list(resp.points)
-        else:
-            hits = client.search(  # type: ignore[attr-defined]
-                collection_name=settings.qdrant_collection,
-                query_vector=query_vec,
-                limit=top_k,
-                with_payload=True,
-            )
-    except Exception as exc:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Qdrant search failed: {exc}") from exc
-
-    chunk_ids: list[uuid.UUID] = []
-    scored: dict[uuid.UUID, float] = {}
-    for h in hits:
-        payload = h.payload or {}
-        try:
-            cid = uuid.UUID(str(payload.get("chunk_id") or h.id))
-        except Exception:
-            continue
-        chunk_ids.append(cid)
-        scored[cid] = float(h.score or 0.0)
-
-    if not chunk_ids:
-        return KnowledgeSearchResponse(items=[])
-
-    result = await db.execute(
-        select(Chunk, Document)
-        .join(Document, Chunk.document_id == Document.id)
-        .where(Chunk.id.in_(chunk_ids))
-    )
-    rows = result.all()
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Search failed: {exc}") from exc
 
-    items: list[KnowledgeSearchItem] = []
-    for chunk, doc in rows:
-        score = scored.get(chunk.id, 0.0)
-        items.append(
+    return KnowledgeSearchResponse(
+        items=[
             KnowledgeSearchItem(
-                chunk_id=chunk.id,
-                document_id=doc.id,
-                title=doc.title,
-                version=doc.version,
-                source_url=doc.source_url,
-                chunk_index=chunk.chunk_index,
-                score=score,
-                text=chunk.text,
+                chunk_id=c.chunk_id,
+                document_id=c.document_id,
+                title=c.title,
+                version=c.version,
+                source_url=c.source_url,
+                chunk_index=c.chunk_index,
+                score=c.score,
+                text=c.text,
+                rank_score=c.rank_score,
             )
-        )
+            for c in retrieved
+        ]
+    )
 
-    items.sort(key=lambda x: x.score, reverse=True)
-    return KnowledgeSearchResponse(items=items)
+
+@router.get("/cache-stats", response_model=KnowledgeCacheStatsResponse, dependencies=[Depends(require_admin)])
+async def cache_stats() -> KnowledgeCacheStatsResponse:
+    embedding_cache = get_embedding_cache()
+    answer_cache = get_answer_cache()
+    chunk_cache = get_chunk_cache()
+    user_cache = get_user_cache()
+    return KnowledgeCacheStatsResponse(
+        embedding=CacheStats(**embedding_cache.stats()) if embedding_cache else None,
+        answer=CacheStats(**answer_cache.stats()) if answer_cache else None,
+        chunk=CacheStats(**chunk_cache.stats()) if chunk_cache else None,
+        auth_user=CacheStats(**user_cache.stats()) if user_cache else None,
+    )
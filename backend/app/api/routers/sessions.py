@@ -14,7 +14,6 @@ from app.db.session import get_db_session
 from app.models.message import Message
 from app.models.qa_run import QARun
 from app.models.session import Session
-from app.models.user import User
 from app.schemas.message import MessageResponse
 from app.schemas.session import (
     SessionCreateRequest,
@@ -24,6 +23,7 @@ from app.schemas.session import (
     SessionUpdateRequest,
     SessionWithMessagesResponse,
 )
+from app.services.user_cache import AuthUser
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
@@ -48,7 +48,7 @@ def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
 @router.post("", response_model=SessionResponse)
 async def create_session(
     payload: SessionCreateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> SessionResponse:
     session = Session(user_id=current_user.id, title=payload.title.strip() if payload.title else None)
@@ -62,7 +62,7 @@ async def create_session(
 async def list_sessions(
     cursor: str | None = None,
     limit: int = Query(default=20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> SessionListResponse:
     stmt = select(Session).where(Session.user_id == current_user.id)
@@ -93,7 +93,7 @@ async def list_sessions(
 @router.get("/{session_id}", response_model=SessionWithMessagesResponse)
 async def get_session(
     session_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> SessionWithMessagesResponse:
     session_result = await db.execute(
@@ -120,7 +120,7 @@ async def get_session(
 async def update_session(
     session_id: uuid.UUID,
     payload: SessionUpdateRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> SessionResponse:
     result = await db.execute(
@@ -141,7 +141,7 @@ async def update_session(
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
     session_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db_session),
 ) -> None:
     result = await db.execute(
@@ -0,0 +1,173 @@
+"""
+Maintenance commands.
+
+    python -m app.cli backfill-payload-text [--batch-size 256]
+    python -m app.cli clear-payload-text
+    python -m app.cli backfill-payload-metadata [--batch-size 256]
+    python -m app.cli reconfigure-collection [--dry-run]
+    python -m app.cli ingest-worker [--concurrency N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+import uuid
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+
+from sqlalchemy import Row, Select, select, tuple_
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.db.session import get_engine, get_sessionmaker
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.rag.qdrant_store import (
+    bootstrap_qdrant,
+    close_qdrant_client,
+    collection_drift,
+    delete_payload_key,
+    ensure_collection,
+    get_qdrant_client,
+    reconfigure_collection,
+    set_point_payloads,
+)
+from app.services.cpu_pool import start_cpu_pool, stop_cpu_pool
+from app.services.http_clients import close_http_clients, init_http_clients
+from app.services.ingestion import start_ingestion_workers, stop_ingestion_workers
+
+logger = logging.getLogger("app.cli")
+
+
+async def _chunk_pages(stmt: Select, *, batch_size: int) -> AsyncIterator[list[Row]]:
+    """Pages of `stmt` rows over all chunks; `stmt` must select Chunk.id and Chunk.created_at first."""
+    cursor: tuple[datetime, uuid.UUID] | None = None
+    while True:
+        page = stmt.order_by(Chunk.created_at, Chunk.id).limit(batch_size)
+        if cursor is not None:
+            page = page.where(tuple_(Chunk.created_at, Chunk.id) > cursor)
+        async with get_sessionmaker()() as db:
+            rows = (await db.execute(page)).all()
+        if not rows:
+            return
+        yield rows
+        cursor = (rows[-1][1], rows[-1][0])
+
+
+async def _backfill(stmt: Select, build: Callable[[Row], dict], *, batch_size: int) -> None:
+    scanned = updated = 0
+    async for rows in _chunk_pages(stmt, batch_size=batch_size):
+        updated += await set_point_payloads([(str(row[0]), build(row)) for row in rows])
+        scanned += len(rows)
+        logger.info("Backfilled %d/%d chunks", updated, scanned)
+    logger.info("Done: %d points updated, %d chunks without a point skipped", updated, scanned - updated)
+
+
+async def backfill_payload_text(*, batch_size: int) -> None:
+    """Copy chunks.text into the payload of every existing Qdrant point."""
+    if not get_settings().qdrant_payload_text:
+        logger.warning("QDRANT_PAYLOAD_TEXT is off: new imports will not write text until it is enabled")
+    await _backfill(
+        select(Chunk.id, Chunk.created_at, Chunk.text),
+        lambda row: {"text": row.text},
+        batch_size=batch_size,
+    )
+
+
+async def backfill_payload_metadata(*, batch_size: int) -> None:
+    """Add the document fields used by retrieval filters to points indexed before they existed."""
+    await _backfill(
+        select(Chunk.id, Chunk.created_at, Document.source_type, Document.created_at.label("document_created_at"))
+        .join(Document, Chunk.document_id == Document.id),
+        lambda row: {"source_type": row.source_type, "created_at": row.document_created_at.isoformat()},
+        batch_size=batch_size,
+    )
+
+
+async def clear_payload_text() -> None:
+    await delete_payload_key("text")
+    logger.info("Removed 'text' from all point payloads")
+
+
+async def reconfigure(*, dry_run: bool) -> None:
+    """Bring the existing collection's HNSW/quantization/on-disk layout in line with settings."""
+    settings = get_settings()
+    if dry_run:
+        client = get_qdrant_client()
+        await ensure_collection(client)
+        changes = collection_drift(await client.get_collection(settings.qdrant_collection), settings)
+    else:
+        changes = await reconfigure_collection()
+    if not changes:
+        logger.info("Collection '%s' already matches settings", settings.qdrant_collection)
+        return
+    for change in changes:
+        logger.info("%s %s", "would change" if dry_run else "changed", change)
+    if not dry_run:
+        logger.info("Qdrant is rebuilding the collection in the background; watch its status for 'green'")
+
+
+async def ingest_worker(*, concurrency: int) -> None:
+    """
+    Process queued import jobs until SIGINT/SIGTERM. Runs the same claim loop as the API's
+    in-process workers, for deployments that set INGESTION_WORKERS=0 on the API.
+    """
+    init_http_clients()
+    await bootstrap_qdrant()
+    start_cpu_pool()
+    start_ingestion_workers(concurrency=concurrency)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    logger.info("Ingestion worker running with %d concurrent jobs", concurrency)
+    try:
+        await stop.wait()
+    finally:
+        # Jobs interrupted here go back to "queued" and are resumed by the next worker.
+        await stop_ingestion_workers()
+        await stop_cpu_pool()
+        await close_http_clients()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        if args.command == "backfill-payload-text":
+            await backfill_payload_text(batch_size=args.batch_size)
+        elif args.command == "clear-payload-text":
+            await clear_payload_text()
+        elif args.command == "backfill-payload-metadata":
+            await backfill_payload_metadata(batch_size=args.batch_size)
+        elif args.command == "reconfigure-collection":
+            await reconfigure(dry_run=args.dry_run)
+        elif args.command == "ingest-worker":
+            await ingest_worker(concurrency=args.concurrency)
+    finally:
+        await close_qdrant_client()
+        await get_engine().dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill-payload-text", help="store chunk text in existing Qdrant payloads")
+    backfill.add_argument("--batch-size", type=int, default=256)
+    sub.add_parser("clear-payload-text", help="remove chunk text from all Qdrant payloads")
+    metadata = sub.add_parser("backfill-payload-metadata", help="add source_type/created_at to existing payloads")
+    metadata.add_argument("--batch-size", type=int, default=256)
+    reconf = sub.add_parser("reconfigure-collection", help="apply HNSW/quantization/on-disk settings to the collection")
+    reconf.add_argument("--dry-run", action="store_true", help="only list the changes")
+    worker = sub.add_parser("ingest-worker", help="process queued knowledge import jobs until stopped")
+    worker.add_argument(
+        "--concurrency", type=int, default=max(1, get_settings().ingestion_workers), help="jobs run at once"
+    )
+
+    configure_logging()
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
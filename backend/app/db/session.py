@@ -1,19 +1,65 @@
 from __future__ import annotations
 
-from collections.abc import AsyncGenerator
+import json
+import logging
+from collections.abc import AsyncGenerator, Callable
 from functools import lru_cache
+from typing import Any
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _json_codec(name: str) -> tuple[Callable[[Any], str], Callable[[str | bytes], Any]]:
+    """Serializer/deserializer for JSONB columns (citations, safety_flags, timings)."""
+    if name == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            logger.warning("DB_JSON_SERIALIZER=orjson but the 'orjson' package is not installed; using json")
+        else:
+            return (lambda obj: orjson.dumps(obj).decode()), orjson.loads
+    elif name != "json":
+        raise RuntimeError(f"Unsupported DB_JSON_SERIALIZER: {name}")
+    # Compact and without \uXXXX escapes: Chinese text is sent at half the size (JSONB
+    # stores the same value either way).
+    return (lambda obj: json.dumps(obj, ensure_ascii=False, separators=(",", ":"))), json.loads
+
+
+def build_engine(settings: Settings) -> AsyncEngine:
+    serializer, deserializer = _json_codec(settings.db_json_serializer.lower())
+    connect_args: dict[str, Any] = {}
+    if make_url(settings.database_url).get_driver_name() == "asyncpg":
+        # Two caches: asyncpg's own and SQLAlchemy's adapter cache; both must be 0 behind
+        # pgbouncer in transaction pooling mode.
+        connect_args["statement_cache_size"] = settings.db_statement_cache_size
+        connect_args["prepared_statement_cache_size"] = settings.db_statement_cache_size
+        if settings.db_statement_timeout_ms > 0:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+    return create_async_engine(
+        settings.database_url,
+        # Without pre-ping, stale connections are only retired by pool_recycle.
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        json_serializer=serializer,
+        json_deserializer=deserializer,
+        connect_args=connect_args,
+    )
 
 
 @lru_cache(maxsize=1)
 def get_engine() -> AsyncEngine:
-    settings = get_settings()
-    return create_async_engine(settings.database_url, pool_pre_ping=True)
+    return build_engine(get_settings())
 
 
+@lru_cache(maxsize=1)
 def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(get_engine(), expire_on_commit=False)
 
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -9,13 +12,41 @@ from app.api.routers.knowledge import router as knowledge_router
 from app.api.routers.sessions import router as sessions_router
 from app.core.config import get_settings
 from app.core.logging import configure_logging
+from app.rag.lexical import start_lexical_index, stop_lexical_index
+from app.rag.qdrant_store import bootstrap_qdrant, close_qdrant_client
+from app.rag.reranker import start_reranker, stop_reranker
+from app.services.chat_writer import start_chat_writer, stop_chat_writer
+from app.services.cpu_pool import start_cpu_pool, stop_cpu_pool
+from app.services.http_clients import close_http_clients, init_http_clients
+from app.services.ingestion import start_ingestion_workers, stop_ingestion_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    init_http_clients()
+    await bootstrap_qdrant()
+    start_cpu_pool()
+    start_lexical_index()
+    start_reranker()
+    start_ingestion_workers()
+    start_chat_writer()
+    try:
+        yield
+    finally:
+        await stop_chat_writer()
+        await stop_ingestion_workers()
+        await stop_reranker()
+        await stop_lexical_index()
+        await stop_cpu_pool()
+        await close_qdrant_client()
+        await close_http_clients()
 
 
 def create_app() -> FastAPI:
     configure_logging()
     settings = get_settings()
 
-    app = FastAPI(title=settings.app_name)
+    app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
     app.add_middleware(
         CORSMiddleware,
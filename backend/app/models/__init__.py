@@ -1,8 +1,9 @@
 from app.models.chunk import Chunk
 from app.models.document import Document
+from app.models.ingestion_job import IngestionJob
 from app.models.message import Message
 from app.models.qa_run import QARun
 from app.models.session import Session
 from app.models.user import User
 
-__all__ = ["User", "Session", "Message", "QARun", "Document", "Chunk"]
+__all__ = ["User", "Session", "Message", "QARun", "Document", "Chunk", "IngestionJob"]
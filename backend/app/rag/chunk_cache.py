@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from app.core.config import get_settings
+
+if TYPE_CHECKING:
+    from app.rag.retriever import RetrievedChunk
+
+# Rough per-entry overhead of the dataclass, key and bookkeeping, on top of the strings.
+_ENTRY_OVERHEAD_BYTES = 400
+
+
+def _entry_bytes(item: RetrievedChunk) -> int:
+    return (
+        len(item.text.encode("utf-8"))
+        + len(item.title.encode("utf-8"))
+        + len(item.source_url or "")
+        + len(item.version or "")
+        + _ENTRY_OVERHEAD_BYTES
+    )
+
+
+class ChunkCache:
+    """
+    LRU of hydrated chunks (text + document metadata) keyed by chunk id, bounded by bytes.
+
+    Chunks are immutable after import, so entries only go away on eviction, on document
+    deletion in this process, or after `ttl_sec`, which bounds staleness when another worker
+    deletes a document.
+    """
+
+    def __init__(self, *, max_bytes: int, ttl_sec: float) -> None:
+        self._max_bytes = max(0, max_bytes)
+        self._ttl_sec = ttl_sec
+        self._entries: OrderedDict[uuid.UUID, tuple[RetrievedChunk, int, float]] = OrderedDict()
+        self._by_document: dict[uuid.UUID, set[uuid.UUID]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, chunk_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, RetrievedChunk]:
+        now = time.monotonic()
+        found: dict[uuid.UUID, RetrievedChunk] = {}
+        for cid in chunk_ids:
+            entry = self._entries.get(cid)
+            if entry is not None and entry[2] <= now:
+                self._remove(cid)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                continue
+            self._entries.move_to_end(cid)
+            self.hits += 1
+            found[cid] = entry[0]
+        return found
+
+    def put_many(self, items: Iterable[RetrievedChunk]) -> None:
+        expires_at = time.monotonic() + self._ttl_sec
+        for item in items:
+            size = _entry_bytes(item)
+            if size > self._max_bytes:
+                continue
+            if item.chunk_id in self._entries:
+                self._remove(item.chunk_id)
+            self._entries[item.chunk_id] = (item, size, expires_at)
+            self._by_document.setdefault(item.document_id, set()).add(item.chunk_id)
+            self._bytes += size
+        while self._bytes > self._max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate_document(self, document_id: uuid.UUID) -> int:
+        chunk_ids = self._by_document.pop(document_id, set())
+        for cid in chunk_ids:
+            self._remove(cid)
+        return len(chunk_ids)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_document.clear()
+        self._bytes = 0
+
+    def _remove(self, chunk_id: uuid.UUID) -> None:
+        entry = self._entries.pop(chunk_id, None)
+        if entry is None:
+            return
+        item, size, _ = entry
+        self._bytes -= size
+        siblings = self._by_document.get(item.document_id)
+        if siblings is not None:
+            siblings.discard(chunk_id)
+            if not siblings:
+                del self._by_document[item.document_id]
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "bytes": self._bytes,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_chunk_cache() -> ChunkCache | None:
+    settings = get_settings()
+    if not settings.chunk_cache_enabled:
+        return None
+    return ChunkCache(max_bytes=settings.chunk_cache_max_bytes, ttl_sec=settings.chunk_cache_ttl_sec)
+
+
+def invalidate_document_chunks(document_id: uuid.UUID) -> None:
+    cache = get_chunk_cache()
+    if cache is not None:
+        cache.invalidate_document(document_id)
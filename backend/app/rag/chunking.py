@@ -1,51 +1,353 @@
 from __future__ import annotations
 
+import codecs
 import re
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
 from dataclasses import dataclass
+from typing import Protocol, TextIO
+
+from app.core.config import get_settings
+from app.rag.tokens import TokenCounter, get_token_counter
 
 
 @dataclass(frozen=True)
 class ChunkItem:
     index: int
     text: str
+    token_count: int | None = None
+    section: str | None = None
+
+
+class LineChunker(Protocol):
+    """Incremental chunker: fed one line at a time, yields chunks as soon as they are complete."""
+
+    def feed(self, line: str) -> Iterator[ChunkItem]: ...
+
+    def finish(self) -> Iterator[ChunkItem]: ...
+
+
+class CharChunker:
+    """
+    Legacy character splitter: paragraphs (separated by blank lines) are merged up to
+    `max_chars`, and longer ones are cut into `max_chars` windows overlapping by
+    `overlap_chars`. Buffers hold string parts plus a running length, so merging stays linear.
+    """
+
+    def __init__(self, *, max_chars: int = 1200, overlap_chars: int = 120) -> None:
+        self._max_chars = max(1, max_chars)
+        self._overlap_chars = max(0, min(overlap_chars, self._max_chars - 1))
+        self._para: list[str] = []
+        self._merged: list[str] = []
+        self._merged_len = 0
+        self._index = 0
+
+    def feed(self, line: str) -> Iterator[ChunkItem]:
+        if line.strip():
+            self._para.append(line)
+            return
+        yield from self._end_paragraph()
+
+    def finish(self) -> Iterator[ChunkItem]:
+        yield from self._end_paragraph()
+        yield from self._emit_merged()
+
+    def _end_paragraph(self) -> Iterator[ChunkItem]:
+        if not self._para:
+            return
+        para = "\n".join(self._para).strip()
+        self._para = []
+        if self._merged and self._merged_len + 2 + len(para) > self._max_chars:
+            yield from self._emit_merged()
+        self._merged.append(para)
+        self._merged_len += len(para) + (2 if len(self._merged) > 1 else 0)
+
+    def _emit_merged(self) -> Iterator[ChunkItem]:
+        if not self._merged:
+            return
+        text = "\n\n".join(self._merged)
+        self._merged = []
+        self._merged_len = 0
+        if len(text) <= self._max_chars:
+            yield self._item(text)
+            return
+        step = self._max_chars - self._overlap_chars
+        start = 0
+        while True:
+            end = min(len(text), start + self._max_chars)
+            yield self._item(text[start:end])
+            if end >= len(text):
+                break
+            start += step
+
+    def _item(self, text: str) -> ChunkItem:
+        item = ChunkItem(index=self._index, text=text)
+        self._index += 1
+        return item
 
 
 def chunk_text(raw_text: str, *, max_chars: int = 1200, overlap_chars: int = 120) -> list[ChunkItem]:
-    text = raw_text.strip()
-    if not text:
-        return []
-
-    parts = [p.strip() for p in re.split(r"\n{2,}", text) if p.strip()]
-    merged: list[str] = []
-    buf = ""
-    for p in parts:
-        if not buf:
-            buf = p
+    return list(_run(CharChunker(max_chars=max_chars, overlap_chars=overlap_chars), iter_lines(raw_text)))
+
+
+# Sentence ends: CJK 。！？； (and !? ), or an ASCII period followed by whitespace/end so that
+# decimals like "2.5mg" and abbreviations inside tokens are not split. Closing quotes and
+# brackets stay with their sentence.
+_SENTENCE_END_RE = re.compile(r"(?:[。！？；!?]+|\.+(?=[\s”’\"')）]|$))[”’\"')）」』]*")
+
+# Arabic-numbered lines ("1. 发热", "2、咳嗽", "1.2 治疗") are deliberately not headings: in
+# clinical text they are mostly short list items, which belong in the surrounding chunk.
+_HEADING_RE = re.compile(
+    r"#{1,6}\s+(?P<md>.+?)\s*#*"
+    r"|【(?P<bracket>[^】]+)】"
+    r"|(?P<numbered>"
+    r"(?:第[一二三四五六七八九十百零〇\d]+[章节部分篇]"
+    r"|[一二三四五六七八九十]+、"
+    r"|[（(][一二三四五六七八九十]+[)）])"
+    r"\s*\S.*)"
+)
+_HEADING_MAX_CHARS = 40
+_LIST_ITEM_RE = re.compile(r"(?:\d+(?:\.\d+)*[.、．)）]|[-*•·]\s)")
+_NOT_HEADING_ENDINGS = tuple("。！？；.!?，,")
+
+
+def detect_heading(line: str) -> str | None:
+    """Return the section title if `line` looks like a heading, else None."""
+    if len(line) > _HEADING_MAX_CHARS or line.endswith(_NOT_HEADING_ENDINGS):
+        return None
+    m = _HEADING_RE.fullmatch(line)
+    if m is None:
+        return None
+    return (m.group("md") or m.group("bracket") or m.group("numbered")).strip()
+
+
+def split_sentences(text: str) -> Iterator[str]:
+    start = 0
+    for m in _SENTENCE_END_RE.finditer(text):
+        sentence = text[start : m.end()].strip()
+        if sentence:
+            yield sentence
+        start = m.end()
+    tail = text[start:].strip()
+    if tail:
+        yield tail
+
+
+def _is_cjk(ch: str) -> bool:
+    return ch >= "\u2e80" or ch in "\u3002\uff01\uff1f\uff1b\uff0c\uff1a\u3001"
+
+
+class SentencePacker:
+    """
+    Packs sentences into chunks of at most `max_tokens`, carrying up to `overlap_tokens` of
+    trailing sentences into the next chunk. Each sentence is tokenized once, so the cost is
+    linear in the input; overlap carry-over is bounded by `overlap_tokens`. A heading starts
+    a new chunk, except right after another heading: consecutive headings ("# 感冒" then
+    "一、概述") stay together at the top of the chunk for the first body text.
+    """
+
+    def __init__(self, *, max_tokens: int, overlap_tokens: int, count_tokens: TokenCounter) -> None:
+        self._max_tokens = max(1, max_tokens)
+        self._overlap_tokens = max(0, min(overlap_tokens, self._max_tokens // 2))
+        self._count = count_tokens
+        self._units: list[tuple[str, str, int]] = []  # (separator, text, tokens)
+        self._tokens = 0
+        self._index = 0
+        self._section: str | None = None
+        self._headings_only = False
+
+    def add_heading(self, line: str, *, section: str) -> Iterator[ChunkItem]:
+        if not self._headings_only:
+            yield from self.flush()
+        self._section = section
+        yield from self._add_unit(line, "\n" if self._units else "")
+        self._headings_only = True
+
+    def add(self, sentence: str, *, separator: str) -> Iterator[ChunkItem]:
+        self._headings_only = False
+        tokens = self._count(sentence)
+        if tokens > self._max_tokens:
+            # A single run-on sentence (tables, lists without punctuation): cut it evenly.
+            pieces = -(-tokens // self._max_tokens)
+            size = -(-len(sentence) // pieces)
+            for start in range(0, len(sentence), size):
+                yield from self._add_unit(sentence[start : start + size], separator if start == 0 else "")
+            return
+        yield from self._add_unit(sentence, separator, tokens)
+
+    def flush(self) -> Iterator[ChunkItem]:
+        # Trailing headings with no body are dropped, unless they are all the text there is.
+        if self._units and not (self._headings_only and self._index):
+            yield self._emit()
+        self._units = []
+        self._tokens = 0
+        self._headings_only = False
+
+    def _add_unit(self, text: str, separator: str, tokens: int | None = None) -> Iterator[ChunkItem]:
+        tokens = self._count(text) if tokens is None else tokens
+        if self._units and self._tokens + tokens > self._max_tokens:
+            yield self._emit()
+            self._carry_overlap(tokens)
+        self._units.append((separator, text, tokens))
+        self._tokens += tokens
+
+    def _carry_overlap(self, incoming: int) -> None:
+        budget = min(self._overlap_tokens, self._max_tokens - incoming)
+        kept: list[tuple[str, str, int]] = []
+        total = 0
+        for unit in reversed(self._units):
+            if total + unit[2] > budget:
+                break
+            kept.append(unit)
+            total += unit[2]
+        kept.reverse()
+        self._units = kept
+        self._tokens = total
+
+    def _emit(self) -> ChunkItem:
+        parts: list[str] = []
+        prev = ""
+        for i, (sep, text, _) in enumerate(self._units):
+            if i:
+                if sep == " " and prev and _is_cjk(prev[-1]) and _is_cjk(text[0]):
+                    sep = ""
+                parts.append(sep)
+            parts.append(text)
+            prev = text
+        item = ChunkItem(index=self._index, text="".join(parts), token_count=self._tokens, section=self._section)
+        self._index += 1
+        return item
+
+
+class SentenceChunker:
+    """
+    Headings start a new chunk and set `section`; paragraphs are split into sentences on
+    。！？；.!? and packed to the token budget.
+    """
+
+    def __init__(self, *, max_tokens: int, overlap_tokens: int, count_tokens: TokenCounter | None = None) -> None:
+        self._packer = SentencePacker(
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            count_tokens=count_tokens or get_token_counter(),
+        )
+        self._separator = ""
+
+    def feed(self, raw_line: str) -> Iterator[ChunkItem]:
+        line = raw_line.strip()
+        if not line:
+            self._separator = "\n\n"
+            return
+        heading = detect_heading(line)
+        if heading is not None:
+            yield from self._packer.add_heading(line, section=heading)
+            self._separator = "\n\n"
+            return
+        # List items keep their own lines; any other single newline inside a paragraph is
+        # usually a hard wrap, so those lines join with a space.
+        list_item = _LIST_ITEM_RE.match(line) is not None
+        if list_item and self._separator == " ":
+            self._separator = "\n"
+        for sentence in split_sentences(line):
+            yield from self._packer.add(sentence, separator=self._separator or " ")
+            self._separator = " "
+        if list_item:
+            self._separator = "\n"
+
+    def finish(self) -> Iterator[ChunkItem]:
+        yield from self._packer.flush()
+
+
+def chunk_sentences(raw_text: str, *, max_tokens: int, overlap_tokens: int) -> list[ChunkItem]:
+    return list(_run(SentenceChunker(max_tokens=max_tokens, overlap_tokens=overlap_tokens), iter_lines(raw_text)))
+
+
+def iter_lines(source: str | TextIO, *, read_size: int = 1 << 16) -> Iterator[str]:
+    """Yield lines (without newlines) from a string or a text file-like object, lazily."""
+    if isinstance(source, str):
+        start = 0
+        while (nl := source.find("\n", start)) != -1:
+            yield source[start:nl]
+            start = nl + 1
+        if start < len(source):
+            yield source[start:]
+        return
+
+    pending: list[str] = []
+    while block := source.read(read_size):
+        parts = block.split("\n")
+        if len(parts) == 1:
+            pending.append(block)
             continue
-        if len(buf) + 2 + len(p) <= max_chars:
-            buf = f"{buf}\n\n{p}"
-        else:
-            merged.append(buf)
-            buf = p
-    if buf:
-        merged.append(buf)
-
-    chunks: list[ChunkItem] = []
-    for i, m in enumerate(merged):
-        if len(m) <= max_chars:
-            chunks.append(ChunkItem(index=i, text=m))
+        pending.append(parts[0])
+        yield "".join(pending)
+        yield from parts[1:-1]
+        pending = [parts[-1]]
+    tail = "".join(pending)
+    if tail:
+        yield tail
+
+
+async def aiter_lines(stream: AsyncIterable[str | bytes], *, encoding: str = "utf-8") -> AsyncIterator[str]:
+    """Async counterpart of `iter_lines` for byte or text streams (e.g. an upload body)."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending: list[str] = []
+    async for block in stream:
+        text = decoder.decode(block) if isinstance(block, bytes) else block
+        parts = text.split("\n")
+        if len(parts) == 1:
+            pending.append(text)
             continue
+        pending.append(parts[0])
+        yield "".join(pending)
+        for line in parts[1:-1]:
+            yield line
+        pending = [parts[-1]]
+    pending.append(decoder.decode(b"", final=True))
+    tail = "".join(pending)
+    if tail:
+        yield tail
 
-        start = 0
-        piece_index = i
-        while start < len(m):
-            end = min(len(m), start + max_chars)
-            piece = m[start:end]
-            chunks.append(ChunkItem(index=piece_index, text=piece))
-            piece_index += 1
-            if end >= len(m):
-                break
-            start = max(0, end - overlap_chars)
 
-    return chunks
+def _run(chunker: LineChunker, lines: Iterable[str]) -> Iterator[ChunkItem]:
+    for line in lines:
+        yield from chunker.feed(line)
+    yield from chunker.finish()
+
+
+def _sentence_engine() -> LineChunker:
+    settings = get_settings()
+    return SentenceChunker(max_tokens=settings.chunk_max_tokens, overlap_tokens=settings.chunk_overlap_tokens)
+
+
+CHUNK_ENGINES: dict[str, Callable[[], LineChunker]] = {
+    "sentence": _sentence_engine,
+    "chars": CharChunker,
+}
+
+
+def new_chunker() -> LineChunker:
+    """Create a chunker for the engine selected by CHUNK_ENGINE."""
+    engine = get_settings().chunk_engine
+    try:
+        factory = CHUNK_ENGINES[engine]
+    except KeyError as exc:
+        raise RuntimeError(f"Unknown CHUNK_ENGINE: {engine}") from exc
+    return factory()
+
+
+def iter_chunks(source: str | TextIO) -> Iterator[ChunkItem]:
+    """Chunk a string or text file incrementally; the first chunks arrive before the input is read."""
+    return _run(new_chunker(), iter_lines(source))
+
+
+async def aiter_chunks(stream: AsyncIterable[str | bytes]) -> AsyncIterator[ChunkItem]:
+    chunker = new_chunker()
+    async for line in aiter_lines(stream):
+        for item in chunker.feed(line):
+            yield item
+    for item in chunker.finish():
+        yield item
+
 
+def chunk_document(raw_text: str) -> list[ChunkItem]:
+    return list(iter_chunks(raw_text))
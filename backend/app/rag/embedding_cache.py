@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.config import get_settings
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query_text(text: str) -> str:
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def embedding_cache_key(text: str, *, provider: str, model: str, dim: int) -> str:
+    raw = f"{provider}\x1f{model}\x1f{dim}\x1f{normalize_query_text(text)}"
+    return hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def _pack(vec: np.ndarray) -> bytes:
+    return np.asarray(vec, dtype=np.float32).tobytes()
+
+
+def _unpack(data: bytes) -> np.ndarray:
+    # Copy so callers may normalise/modify the vector without touching the cached bytes.
+    return np.frombuffer(data, dtype=np.float32).copy()
+
+
+class SqliteEmbeddingStore:
+    """On-disk store shared by every worker process on the same host."""
+
+    def __init__(self, path: str, *, max_entries: int) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_expires_at ON embeddings (expires_at)")
+
+    def get(self, key: str) -> tuple[bytes, float] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT vector, expires_at FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0], row[1]
+
+    def put(self, key: str, data: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, expires_at) VALUES (?, ?, ?)",
+                (key, data, expires_at),
+            )
+            self._writes += 1
+            if self._writes % 256 == 0:
+                self._prune()
+
+    def _prune(self) -> None:
+        self._conn.execute("DELETE FROM embeddings WHERE expires_at <= ?", (time.time(),))
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """Bounded LRU + TTL cache of query embeddings, optionally backed by a shared store."""
+
+    def __init__(self, *, max_entries: int, ttl_sec: float, shared: SqliteEmbeddingStore | None = None) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_sec = ttl_sec
+        self._shared = shared
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+
+    def key_for(self, text: str, *, dim: int) -> str:
+        settings = get_settings()
+        provider = (settings.embedding_provider or "stub").lower()
+        return embedding_cache_key(text, provider=provider, model=settings.embedding_model, dim=dim)
+
+    def _remember(self, key: str, data: bytes, expires_at: float) -> None:
+        self._entries[key] = (expires_at, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> np.ndarray | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _unpack(entry[1])
+            del self._entries[key]
+
+        if self._shared is not None:
+            found = await asyncio.to_thread(self._shared.get, key)
+            if found is not None:
+                data, expires_at = found
+                self._remember(key, data, expires_at)
+                self.hits += 1
+                self.shared_hits += 1
+                return _unpack(data)
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, vec: np.ndarray) -> None:
+        data = _pack(vec)
+        expires_at = time.time() + self._ttl_sec
+        self._remember(key, data, expires_at)
+        if self._shared is not None:
+            await asyncio.to_thread(self._shared.put, key, data, expires_at)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "shared_hits": self.shared_hits,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_embedding_cache() -> EmbeddingCache | None:
+    settings = get_settings()
+    if not settings.embedding_cache_enabled:
+        return None
+
+    shared = None
+    backend = (settings.embedding_cache_backend or "memory").lower()
+    if backend == "sqlite":
+        shared = SqliteEmbeddingStore(
+            settings.embedding_cache_path,
+            max_entries=settings.embedding_cache_shared_max_entries,
+        )
+    elif backend != "memory":
+        raise RuntimeError(f"Unsupported embedding cache backend: {settings.embedding_cache_backend}")
+
+    return EmbeddingCache(
+        max_entries=settings.embedding_cache_max_entries,
+        ttl_sec=settings.embedding_cache_ttl_sec,
+        shared=shared,
+    )
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterable
+from typing import Generic, TypeVar
+
+import httpx
+import numpy as np
+
+from app.core.config import get_settings
+from app.rag.embeddings import embed_texts
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that halves on provider throttling (429) and creeps back up on success.
+
+    All batches of one import share a limiter, so a 429 on any batch pauses the whole import
+    for the advertised Retry-After (or the computed backoff) instead of hammering the provider.
+    """
+
+    def __init__(self, max_in_flight: int) -> None:
+        self._max = max(1, max_in_flight)
+        self._limit = self._max
+        self._active = 0
+        self._successes = 0
+        self._paused_until = 0.0
+        self._cond = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self._limit)
+            self._active += 1
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self, *, throttled: bool = False, retry_after: float | None = None) -> None:
+        async with self._cond:
+            self._active -= 1
+            if throttled:
+                self._successes = 0
+                self._limit = max(1, self._limit // 2)
+                if retry_after:
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            else:
+                self._successes += 1
+                if self._limit < self._max and self._successes >= self._limit:
+                    self._successes = 0
+                    self._limit += 1
+            self._cond.notify_all()
+
+
+def _retry_after(exc: httpx.HTTPStatusError) -> float | None:
+    value = exc.response.headers.get("Retry-After")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code == 429 or code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class _Batch(Generic[T]):
+    __slots__ = ("items", "task")
+
+    def __init__(self, items: list[T], task: asyncio.Task[np.ndarray]) -> None:
+        self.items = items
+        self.task = task
+
+
+async def _embed_with_retries(
+    texts: list[str],
+    *,
+    dim: int,
+    limiter: AdaptiveLimiter,
+    max_retries: int,
+    base_delay: float,
+    max_delay: float,
+) -> np.ndarray:
+    attempt = 0
+    while True:
+        await limiter.acquire()
+        try:
+            vectors = await embed_texts(texts, dim=dim)
+        except Exception as exc:
+            throttled = isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429
+            retry_after = _retry_after(exc) if throttled else None
+            await limiter.release(throttled=throttled, retry_after=retry_after)
+            if not _is_retryable(exc) or attempt >= max_retries:
+                raise
+            delay = retry_after or min(max_delay, base_delay * (2**attempt)) * (0.5 + random.random())
+            attempt += 1
+            logger.warning("Embedding batch failed (%s), retry %d/%d in %.1fs", exc, attempt, max_retries, delay)
+            await asyncio.sleep(delay)
+            continue
+        await limiter.release()
+        return vectors
+
+
+async def iter_embedded_batches(
+    items: Iterable[T],
+    *,
+    text_of: Callable[[T], str],
+    dim: int | None = None,
+    batch_size: int | None = None,
+    max_in_flight: int | None = None,
+) -> AsyncIterator[tuple[list[T], np.ndarray]]:
+    """
+    Embed `items` in batches with up to `max_in_flight` provider calls running at once.
+
+    Batches are yielded in input order, and at most `max_in_flight` batches are buffered, so
+    memory stays bounded however long the input is.
+    """
+    settings = get_settings()
+    dim = dim or settings.embedding_dim
+    batch_size = max(1, int(batch_size or settings.embedding_batch_size or 1))
+    in_flight = max(1, int(max_in_flight or settings.embedding_max_in_flight or 1))
+    limiter = AdaptiveLimiter(in_flight)
+
+    def _submit(batch_items: list[T]) -> _Batch[T]:
+        task = asyncio.create_task(
+            _embed_with_retries(
+                [text_of(x) for x in batch_items],
+                dim=dim,
+                limiter=limiter,
+                max_retries=settings.embedding_max_retries,
+                base_delay=settings.embedding_retry_base_sec,
+                max_delay=settings.embedding_retry_max_sec,
+            )
+        )
+        return _Batch(batch_items, task)
+
+    pending: deque[_Batch[T]] = deque()
+    try:
+        buf: list[T] = []
+        for item in items:
+            buf.append(item)
+            if len(buf) < batch_size:
+                continue
+            pending.append(_submit(buf))
+            buf = []
+            if len(pending) >= in_flight:
+                head = pending.popleft()
+                yield head.items, await head.task
+        if buf:
+            pending.append(_submit(buf))
+        while pending:
+            head = pending.popleft()
+            yield head.items, await head.task
+    finally:
+        for batch in pending:
+            batch.task.cancel()
+        if pending:
+            await asyncio.gather(*(b.task for b in pending), return_exceptions=True)
@@ -1,52 +1,74 @@
 from __future__ import annotations
 
 import hashlib
-import math
-from typing import List
 
-import httpx
+import numpy as np
 
 from app.core.config import get_settings
+from app.rag.embedding_cache import get_embedding_cache
+from app.services.cpu_pool import run_cpu
+from app.services.http_clients import get_http_client
 
+_DIGEST_SIZE = hashlib.sha256().digest_size
 
-def embed_text_stub(text: str, *, dim: int) -> List[float]:
+# Stub batches at least this large are hashed off the event loop (import batches, not queries).
+_OFFLOAD_MIN_TEXTS = 8
+
+
+def embed_texts_stub(texts: list[str], *, dim: int) -> np.ndarray:
     """
-    Deterministic embedding for development:
+    Deterministic embeddings for development:
     - No external model dependency
     - Stable across runs
-    - Produces unit-length vector
+    - Produces unit-length float32 vectors, shape (len(texts), dim)
     """
     if dim <= 0:
         raise ValueError("dim must be positive")
+    if not texts:
+        return np.empty((0, dim), dtype=np.float32)
+
+    digests = b"".join(hashlib.sha256(t.encode("utf-8", errors="ignore")).digest() for t in texts)
+    raw = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), _DIGEST_SIZE)
+    mat = raw[:, np.arange(dim) % _DIGEST_SIZE].astype(np.float32)
+    mat *= 2.0 / 255.0
+    mat -= 1.0
+    return normalize_rows(mat)
 
-    vec = [0.0] * dim
-    data = text.encode("utf-8", errors="ignore")
-    digest = hashlib.sha256(data).digest()
 
-    for i in range(dim):
-        b = digest[i % len(digest)]
-        v = (b / 255.0) * 2.0 - 1.0
-        vec[i] = v
+def embed_text_stub(text: str, *, dim: int) -> np.ndarray:
+    return embed_texts_stub([text], dim=dim)[0]
 
-    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
-    return [x / norm for x in vec]
 
+def normalize_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    mat /= norms
+    return mat
 
-def _normalize(vec: list[float]) -> list[float]:
-    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
-    return [x / norm for x in vec]
 
+async def embed_text(text: str, *, dim: int) -> np.ndarray:
+    cache = get_embedding_cache()
+    if cache is None:
+        return (await embed_texts([text], dim=dim))[0]
 
-async def embed_text(text: str, *, dim: int) -> list[float]:
-    return (await embed_texts([text], dim=dim))[0]
+    key = cache.key_for(text, dim=dim)
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached
 
+    vec = (await embed_texts([text], dim=dim))[0]
+    await cache.put(key, vec)
+    return vec
 
-async def embed_texts(texts: list[str], *, dim: int) -> list[list[float]]:
+
+async def embed_texts(texts: list[str], *, dim: int) -> np.ndarray:
     settings = get_settings()
     provider = (settings.embedding_provider or "stub").lower()
 
     if provider in {"stub", "dev"}:
-        return [embed_text_stub(t, dim=dim) for t in texts]
+        if len(texts) >= _OFFLOAD_MIN_TEXTS:
+            return await run_cpu(embed_texts_stub, texts, dim=dim)
+        return embed_texts_stub(texts, dim=dim)
 
     if provider not in {"openai_compat", "openai-compatible", "volcengine", "ark"}:
         raise RuntimeError(f"Unsupported embedding provider: {settings.embedding_provider}")
@@ -61,10 +83,10 @@ async def embed_texts(texts: list[str], *, dim: int) -> list[list[float]]:
 
     payload = {"model": settings.embedding_model, "input": texts}
 
-    async with httpx.AsyncClient(base_url=base_url, timeout=settings.embedding_timeout_sec) as client:
-        resp = await client.post("/embeddings", headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
+    client = get_http_client("embedding", base_url=base_url, timeout=settings.embedding_timeout_sec)
+    resp = await client.post("/embeddings", headers=headers, json=payload)
+    resp.raise_for_status()
+    data = resp.json()
 
     items = data.get("data") if isinstance(data, dict) else None
     if not isinstance(items, list) or not items:
@@ -77,19 +99,17 @@ async def embed_texts(texts: list[str], *, dim: int) -> list[list[float]]:
 
     items = sorted([x for x in items if isinstance(x, dict)], key=_idx)
 
-    vectors: list[list[float]] = []
-    for item in items:
-        raw = item.get("embedding") or item.get("vector")
-        if not isinstance(raw, list):
-            continue
-        vec = [float(x) for x in raw]
-        if len(vec) != dim:
-            raise RuntimeError(f"Embedding dim mismatch: got {len(vec)}, expected {dim}")
-        if settings.embedding_normalize:
-            vec = _normalize(vec)
-        vectors.append(vec)
-
-    if len(vectors) != len(texts):
-        raise RuntimeError(f"Embedding count mismatch: got {len(vectors)}, expected {len(texts)}")
+    rows = [item.get("embedding") or item.get("vector") for item in items]
+    rows = [r for r in rows if isinstance(r, list)]
+    if len(rows) != len(texts):
+        raise RuntimeError(f"Embedding count mismatch: got {len(rows)}, expected {len(texts)}")
+
+    bad = next((len(r) for r in rows if len(r) != dim), None)
+    if bad is not None:
+        raise RuntimeError(f"Embedding dim mismatch: got {bad}, expected {dim}")
+
+    vectors = np.asarray(rows, dtype=np.float32)
 
+    if settings.embedding_normalize:
+        vectors = normalize_rows(vectors)
     return vectors
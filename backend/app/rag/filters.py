@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from qdrant_client.http import models as qm
+from sqlalchemy import ColumnElement
+
+from app.models.document import Document
+
+
+@dataclass(frozen=True)
+class RetrievalFilter:
+    """
+    Restricts retrieval to documents matching every given field (values within a field are OR-ed).
+
+    The same filter is applied to Qdrant as a payload filter and to Postgres as `documents`
+    conditions, so vector and lexical hits are narrowed identically.
+    """
+
+    document_ids: tuple[uuid.UUID, ...] = ()
+    versions: tuple[str, ...] = ()
+    source_types: tuple[str, ...] = ()
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.document_ids
+            or self.versions
+            or self.source_types
+            or self.created_from is not None
+            or self.created_to is not None
+        )
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    # Naive bounds are taken as UTC, which is what documents.created_at is stored in.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def make_filter(
+    *,
+    document_ids: list[uuid.UUID] | None = None,
+    versions: list[str] | None = None,
+    source_types: list[str] | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> RetrievalFilter | None:
+    flt = RetrievalFilter(
+        document_ids=tuple(dict.fromkeys(document_ids or ())),
+        versions=tuple(dict.fromkeys(versions or ())),
+        source_types=tuple(dict.fromkeys(source_types or ())),
+        created_from=_aware(created_from),
+        created_to=_aware(created_to),
+    )
+    return flt or None
+
+
+def qdrant_filter(flt: RetrievalFilter | None) -> qm.Filter | None:
+    """Payload filter over the keyword/datetime indexes created by `ensure_collection`."""
+    if not flt:
+        return None
+    must: list[qm.Condition] = []
+    if flt.document_ids:
+        must.append(qm.FieldCondition(key="document_id", match=qm.MatchAny(any=[str(d) for d in flt.document_ids])))
+    if flt.versions:
+        must.append(qm.FieldCondition(key="version", match=qm.MatchAny(any=list(flt.versions))))
+    if flt.source_types:
+        must.append(qm.FieldCondition(key="source_type", match=qm.MatchAny(any=list(flt.source_types))))
+    if flt.created_from is not None or flt.created_to is not None:
+        must.append(
+            qm.FieldCondition(key="created_at", range=qm.DatetimeRange(gte=flt.created_from, lte=flt.created_to))
+        )
+    return qm.Filter(must=must)
+
+
+def document_conditions(flt: RetrievalFilter | None) -> list[ColumnElement[bool]]:
+    """The same filter as SQL conditions on `Document`."""
+    if not flt:
+        return []
+    conditions: list[ColumnElement[bool]] = []
+    if flt.document_ids:
+        conditions.append(Document.id.in_(flt.document_ids))
+    if flt.versions:
+        conditions.append(Document.version.in_(flt.versions))
+    if flt.source_types:
+        conditions.append(Document.source_type.in_(flt.source_types))
+    if flt.created_from is not None:
+        conditions.append(Document.created_at >= flt.created_from)
+    if flt.created_to is not None:
+        conditions.append(Document.created_at <= flt.created_to)
+    return conditions
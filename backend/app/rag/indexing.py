@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.config import get_settings
+from app.rag.embedding_scheduler import iter_embedded_batches
+from app.rag.qdrant_store import upsert_vectors
+
+
+@dataclass(frozen=True)
+class IndexItem:
+    point_id: str
+    text: str
+    payload: dict
+
+
+def chunk_payload(
+    *,
+    chunk_id: str,
+    document_id: str,
+    title: str,
+    version: str | None,
+    source_type: str,
+    source_url: str | None,
+    created_at: datetime,
+    chunk_index: int,
+    text: str | None = None,
+) -> dict:
+    payload = {
+        "chunk_id": chunk_id,
+        "document_id": document_id,
+        "title": title,
+        "version": version,
+        "source_type": source_type,
+        "source_url": source_url,
+        "created_at": created_at.isoformat(),
+        "chunk_index": chunk_index,
+    }
+    # With the text in the payload, retrieval needs no Postgres round trip.
+    if text is not None and get_settings().qdrant_payload_text:
+        payload["text"] = text
+    return payload
+
+
+async def _upsert(batch: list[IndexItem], vectors, *, wait: bool) -> None:
+    try:
+        await upsert_vectors([x.point_id for x in batch], vectors, [x.payload for x in batch], wait=wait)
+    except Exception as exc:
+        raise RuntimeError(f"Qdrant upsert failed: {exc}") from exc
+
+
+async def index_items(
+    items: Iterable[IndexItem],
+    *,
+    wait: bool | None = None,
+    on_progress: Callable[[int], Awaitable[None]] | None = None,
+) -> int:
+    """
+    Embed and upsert `items`, writing each batch to Qdrant as soon as it is embedded.
+
+    Upserts overlap with the next embedding batches; at most QDRANT_UPSERT_MAX_IN_FLIGHT are
+    pending, so peak memory is a few batches. `on_progress` receives the number of items
+    durably upserted so far, always in input order.
+    """
+    settings = get_settings()
+    wait = settings.qdrant_upsert_wait if wait is None else wait
+    max_pending = max(1, settings.qdrant_upsert_max_in_flight)
+
+    pending: deque[tuple[asyncio.Task[None], int]] = deque()
+    done = 0
+
+    async def _drain_one() -> None:
+        nonlocal done
+        task, n = pending.popleft()
+        await task
+        done += n
+        if on_progress is not None:
+            await on_progress(done)
+
+    try:
+        async for batch, vectors in iter_embedded_batches(items, text_of=lambda x: x.text):
+            pending.append((asyncio.create_task(_upsert(batch, vectors, wait=wait)), len(batch)))
+            while len(pending) > max_pending:
+                await _drain_one()
+        while pending:
+            await _drain_one()
+    finally:
+        for task, _ in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*(t for t, _ in pending), return_exceptions=True)
+
+    return done
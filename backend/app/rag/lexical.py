@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+import uuid
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import select, tuple_
+
+from app.core.config import get_settings
+from app.db.session import get_sessionmaker
+from app.models.chunk import Chunk
+from app.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+# Latin words, numbers and codes (ICD "e11.9", doses "2.5mg", "covid-19") stay whole; CJK runs
+# become overlapping bigrams, which match Chinese terms without a segmentation dictionary.
+_LATIN_RE = re.compile(r"[a-z0-9]+(?:[.\-_/][a-z0-9]+)*")
+_LATIN_SPLIT_RE = re.compile(r"[.\-_/]")
+_CJK_RUN_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+_REFRESH_PAGE = 5000
+# Chunk created_at is the inserting transaction's start time, so rows can become visible a
+# little "in the past"; each refresh rescans this window and skips ids it already has.
+_REFRESH_OVERLAP = timedelta(minutes=5)
+_PRUNE_BATCH = 5000
+
+
+def lexical_tokens(text: str) -> list[str]:
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens: list[str] = []
+    for word in _LATIN_RE.findall(text):
+        tokens.append(word)
+        if len(word) > 2 and _LATIN_SPLIT_RE.search(word):
+            tokens.extend(p for p in _LATIN_SPLIT_RE.split(word) if p)
+    for m in _CJK_RUN_RE.finditer(text):
+        run = m.group()
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over chunk texts.
+
+    Writers (refreshes) and readers (searches) run in worker threads and share a lock;
+    postings are updated in place, so adding chunks never rebuilds the index. Removed
+    chunks are tombstoned; their postings are only reclaimed on restart.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75) -> None:
+        self._k1 = k1
+        self._b = b
+        self._lock = threading.Lock()
+        self._ids: list[uuid.UUID] = []
+        self._positions: dict[uuid.UUID, int] = {}
+        self._lengths: list[int] = []
+        self._total_length = 0
+        self._postings: dict[str, dict[int, int]] = {}
+        self._by_document: dict[uuid.UUID, list[int]] = {}
+        self._deleted: set[int] = set()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._deleted)
+
+    def __contains__(self, chunk_id: uuid.UUID) -> bool:
+        return chunk_id in self._positions
+
+    def add_many(self, docs: Iterable[tuple[uuid.UUID, uuid.UUID, Counter[str]]]) -> int:
+        """Add (chunk_id, document_id, term frequencies) entries; known chunk ids are skipped."""
+        added = 0
+        with self._lock:
+            for chunk_id, document_id, tf in docs:
+                if chunk_id in self._positions:
+                    continue
+                pos = len(self._ids)
+                self._ids.append(chunk_id)
+                self._positions[chunk_id] = pos
+                self._by_document.setdefault(document_id, []).append(pos)
+                length = sum(tf.values())
+                self._lengths.append(length)
+                self._total_length += length
+                for term, count in tf.items():
+                    self._postings.setdefault(term, {})[pos] = count
+                added += 1
+        return added
+
+    def remove_many(self, chunk_ids: Iterable[uuid.UUID]) -> None:
+        """Tombstone chunks: they stop matching immediately."""
+        with self._lock:
+            for cid in chunk_ids:
+                pos = self._positions.get(cid)
+                if pos is not None:
+                    self._deleted.add(pos)
+
+    def document_ids(self) -> set[uuid.UUID]:
+        with self._lock:
+            return set(self._by_document)
+
+    def remove_documents(self, document_ids: Iterable[uuid.UUID]) -> int:
+        """Tombstone every chunk of the given documents; returns the number of chunks removed."""
+        removed = 0
+        with self._lock:
+            for document_id in document_ids:
+                positions = self._by_document.pop(document_id, [])
+                self._deleted.update(positions)
+                removed += len(positions)
+        return removed
+
+    def search(self, query: str, *, limit: int) -> list[tuple[uuid.UUID, float]]:
+        terms = set(lexical_tokens(query))
+        if not terms or limit <= 0:
+            return []
+        with self._lock:
+            n = len(self._ids)
+            if not n:
+                return []
+            avg_len = self._total_length / n
+            k1, b = self._k1, self._b
+            scores: dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for pos, tf in postings.items():
+                    norm = k1 * (1.0 - b + b * self._lengths[pos] / avg_len)
+                    scores[pos] = scores.get(pos, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+            for pos in self._deleted.intersection(scores):
+                del scores[pos]
+            best = heapq.nlargest(limit, scores.items(), key=lambda x: x[1])
+            return [(self._ids[pos], score) for pos, score in best]
+
+
+def _add_rows(index: BM25Index, rows: list[tuple[uuid.UUID, uuid.UUID, str]]) -> int:
+    """Tokenize and add one page of chunk rows; runs in a worker thread."""
+    # Tokenize before add_many so searches are not held up by the index lock meanwhile.
+    docs = [(chunk_id, document_id, Counter(lexical_tokens(text))) for chunk_id, document_id, text in rows]
+    return index.add_many(docs)
+
+
+class LexicalIndexSync:
+    """
+    Loads the index from the chunks table, then picks up new chunks periodically or on notify.
+    Each refresh also drops documents that no longer exist (deleted through any worker), by
+    diffing the indexed document ids against the documents table.
+    """
+
+    def __init__(self, index: BM25Index, *, refresh_sec: float) -> None:
+        self._index = index
+        self._refresh_sec = refresh_sec
+        self._watermark: datetime | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="lexical-index-sync")
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def refresh(self) -> int:
+        since = self._watermark - _REFRESH_OVERLAP if self._watermark else None
+        cursor: tuple[datetime, uuid.UUID] | None = None
+        added = 0
+        while True:
+            # Keyset pagination: one import commits many chunks with the same created_at.
+            stmt = (
+                select(Chunk.id, Chunk.document_id, Chunk.text, Chunk.created_at)
+                .order_by(Chunk.created_at, Chunk.id)
+                .limit(_REFRESH_PAGE)
+            )
+            if cursor is not None:
+                stmt = stmt.where(tuple_(Chunk.created_at, Chunk.id) > cursor)
+            elif since is not None:
+                stmt = stmt.where(Chunk.created_at >= since)
+            async with get_sessionmaker()() as db:
+                rows = (await db.execute(stmt)).all()
+            if not rows:
+                break
+            fresh = [(cid, document_id, text) for cid, document_id, text, _ in rows if cid not in self._index]
+            if fresh:
+                added += await asyncio.to_thread(_add_rows, self._index, fresh)
+            cursor = (rows[-1].created_at, rows[-1].id)
+            self._watermark = max(self._watermark or cursor[0], cursor[0])
+            if len(rows) < _REFRESH_PAGE:
+                break
+        await self._prune_deleted()
+        return added
+
+    async def _prune_deleted(self) -> None:
+        indexed = self._index.document_ids()
+        if not indexed:
+            return
+        # Only look up the ids the index holds, never the whole documents table.
+        live: set[uuid.UUID] = set()
+        pending = list(indexed)
+        async with get_sessionmaker()() as db:
+            for start in range(0, len(pending), _PRUNE_BATCH):
+                ids = pending[start : start + _PRUNE_BATCH]
+                live.update((await db.execute(select(Document.id).where(Document.id.in_(ids)))).scalars())
+        removed = self._index.remove_documents(indexed - live)
+        if removed:
+            logger.debug("Lexical index: -%d chunks of deleted documents", removed)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                added = await self.refresh()
+                if not self._index.ready:
+                    self._index.ready = True
+                    logger.info("Lexical index loaded: %d chunks", len(self._index))
+                elif added:
+                    logger.debug("Lexical index: +%d chunks", added)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Lexical index refresh failed")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._refresh_sec)
+            except asyncio.TimeoutError:
+                pass
+
+
+@lru_cache(maxsize=1)
+def get_lexical_index() -> BM25Index | None:
+    if not get_settings().lexical_index_enabled:
+        return None
+    return BM25Index()
+
+
+_sync: LexicalIndexSync | None = None
+
+
+def start_lexical_index() -> None:
+    global _sync
+    index = get_lexical_index()
+    if _sync is not None or index is None:
+        return
+    _sync = LexicalIndexSync(index, refresh_sec=get_settings().lexical_refresh_sec)
+    _sync.start()
+
+
+async def stop_lexical_index() -> None:
+    global _sync
+    sync, _sync = _sync, None
+    if sync is not None:
+        await sync.stop()
+
+
+def notify_lexical_index() -> None:
+    if _sync is not None:
+        _sync.notify()
@@ -1,37 +1,313 @@
 from __future__ import annotations
 
-from qdrant_client import QdrantClient
+import asyncio
+import logging
+from functools import lru_cache
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models as qm
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Payload fields used by retrieval filters; indexed so filtered searches stay fast.
+PAYLOAD_INDEXES: dict[str, qm.PayloadSchemaType] = {
+    "document_id": qm.PayloadSchemaType.KEYWORD,
+    "version": qm.PayloadSchemaType.KEYWORD,
+    "source_type": qm.PayloadSchemaType.KEYWORD,
+    "created_at": qm.PayloadSchemaType.DATETIME,
+}
+
+# Collections already verified (or created) by this process.
+_ready_collections: set[str] = set()
+_ensure_lock = asyncio.Lock()
 
 
-def get_qdrant_client() -> QdrantClient:
+@lru_cache(maxsize=1)
+def get_qdrant_client() -> AsyncQdrantClient:
     settings = get_settings()
-    return QdrantClient(url=settings.qdrant_url)
+    return AsyncQdrantClient(
+        url=settings.qdrant_url,
+        timeout=settings.qdrant_timeout_sec,
+        prefer_grpc=settings.qdrant_prefer_grpc,
+    )
+
+
+async def close_qdrant_client() -> None:
+    if get_qdrant_client.cache_info().currsize:
+        try:
+            await get_qdrant_client().close()
+        except Exception:
+            logger.exception("Failed to close Qdrant client")
+        get_qdrant_client.cache_clear()
+    _ready_collections.clear()
 
 
-def ensure_collection(client: QdrantClient) -> None:
+def reset_collection_cache() -> None:
+    _ready_collections.clear()
+
+
+def hnsw_config(settings: Settings) -> qm.HnswConfigDiff:
+    return qm.HnswConfigDiff(
+        m=settings.qdrant_hnsw_m,
+        ef_construct=settings.qdrant_hnsw_ef_construct,
+        on_disk=settings.qdrant_hnsw_on_disk,
+    )
+
+
+def quantization_config(settings: Settings) -> qm.ScalarQuantization | qm.ProductQuantization | None:
+    mode = (settings.qdrant_quantization or "none").lower()
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return qm.ScalarQuantization(
+            scalar=qm.ScalarQuantizationConfig(
+                type=qm.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=settings.qdrant_quantization_always_ram,
+            )
+        )
+    if mode == "product":
+        return qm.ProductQuantization(
+            product=qm.ProductQuantizationConfig(
+                compression=qm.CompressionRatio(settings.qdrant_pq_compression.lower()),
+                always_ram=settings.qdrant_quantization_always_ram,
+            )
+        )
+    raise RuntimeError(f"Unsupported Qdrant quantization: {settings.qdrant_quantization}")
+
+
+def search_params(settings: Settings) -> qm.SearchParams | None:
+    quantized = quantization_config(settings) is not None
+    if not settings.qdrant_search_hnsw_ef and not quantized:
+        return None
+    return qm.SearchParams(
+        hnsw_ef=settings.qdrant_search_hnsw_ef or None,
+        quantization=qm.QuantizationSearchParams(
+            rescore=settings.qdrant_search_rescore,
+            oversampling=settings.qdrant_search_oversampling,
+        )
+        if quantized
+        else None,
+    )
+
+
+def _quantization_label(config: object) -> str:
+    if isinstance(config, qm.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, qm.ProductQuantization):
+        return f"product/{config.product.compression.value}"
+    if isinstance(config, qm.BinaryQuantization):
+        return "binary"
+    return "none"
+
+
+def collection_drift(info: qm.CollectionInfo, settings: Settings) -> list[str]:
+    """Human-readable differences between an existing collection and the configured layout."""
+    wanted_quantization = _quantization_label(quantization_config(settings))
+    vectors = info.config.params.vectors
+    vectors_on_disk = bool(vectors.on_disk) if isinstance(vectors, qm.VectorParams) else None
+    hnsw = info.config.hnsw_config
+    current = {
+        "hnsw.m": hnsw.m,
+        "hnsw.ef_construct": hnsw.ef_construct,
+        "hnsw.on_disk": bool(hnsw.on_disk),
+        "vectors.on_disk": vectors_on_disk,
+        "payload.on_disk": bool(info.config.params.on_disk_payload),
+        "quantization": _quantization_label(info.config.quantization_config),
+    }
+    wanted = {
+        "hnsw.m": settings.qdrant_hnsw_m,
+        "hnsw.ef_construct": settings.qdrant_hnsw_ef_construct,
+        "hnsw.on_disk": settings.qdrant_hnsw_on_disk,
+        "vectors.on_disk": settings.qdrant_vectors_on_disk,
+        "payload.on_disk": settings.qdrant_payload_on_disk,
+        "quantization": wanted_quantization,
+    }
+    return [f"{key}: {current[key]} -> {value}" for key, value in wanted.items() if current[key] != value]
+
+
+async def ensure_collection(client: AsyncQdrantClient | None = None) -> None:
     settings = get_settings()
     name = settings.qdrant_collection
+    if name in _ready_collections:
+        return
+
+    client = client or get_qdrant_client()
+    async with _ensure_lock:
+        if name in _ready_collections:
+            return
+
+        if await client.collection_exists(name):
+            info = await client.get_collection(name)
+            vectors = info.config.params.vectors
+            size = None
+            if isinstance(vectors, qm.VectorParams):
+                size = vectors.size
+            elif isinstance(vectors, dict) and vectors:
+                size = next(iter(vectors.values())).size
+
+            if size is not None and size != settings.embedding_dim:
+                raise RuntimeError(
+                    f"Qdrant collection '{name}' vector size is {size}, but EMBEDDING_DIM is {settings.embedding_dim}. "
+                    "Drop the collection or align EMBEDDING_DIM."
+                )
+            drift = collection_drift(info, settings)
+            if drift:
+                logger.warning(
+                    "Qdrant collection '%s' differs from settings (%s); run 'python -m app.cli reconfigure-collection'",
+                    name,
+                    "; ".join(drift),
+                )
+            await _ensure_payload_indexes(client, name, existing=set(info.payload_schema or {}))
+            _ready_collections.add(name)
+            return
 
-    if client.collection_exists(name):
-        info = client.get_collection(name)
-        vectors = info.config.params.vectors
-        size = None
-        if isinstance(vectors, qm.VectorParams):
-            size = vectors.size
-        elif isinstance(vectors, dict) and vectors:
-            size = next(iter(vectors.values())).size
-
-        if size is not None and size != settings.embedding_dim:
-            raise RuntimeError(
-                f"Qdrant collection '{name}' vector size is {size}, but EMBEDDING_DIM is {settings.embedding_dim}. "
-                "Drop the collection or align EMBEDDING_DIM."
+        await client.create_collection(
+            collection_name=name,
+            vectors_config=qm.VectorParams(
+                size=settings.embedding_dim,
+                distance=qm.Distance.COSINE,
+                on_disk=settings.qdrant_vectors_on_disk,
+            ),
+            hnsw_config=hnsw_config(settings),
+            quantization_config=quantization_config(settings),
+            on_disk_payload=settings.qdrant_payload_on_disk,
+        )
+        await _ensure_payload_indexes(client, name, existing=set())
+        _ready_collections.add(name)
+
+
+async def _ensure_payload_indexes(client: AsyncQdrantClient, name: str, *, existing: set[str]) -> None:
+    # wait=False: on a large collection Qdrant builds the index in the background; filtered
+    # searches still work (unindexed) until it is ready.
+    for field_name, schema in PAYLOAD_INDEXES.items():
+        if field_name not in existing:
+            await client.create_payload_index(
+                collection_name=name, field_name=field_name, field_schema=schema, wait=False
             )
+
+
+async def reconfigure_collection() -> list[str]:
+    """
+    Apply the configured HNSW, quantization and on-disk settings to the existing collection.
+
+    Qdrant rebuilds indexes and quantized vectors in the background; the collection stays
+    searchable meanwhile. Returns the changes that were applied.
+    """
+    settings = get_settings()
+    client = get_qdrant_client()
+    await ensure_collection(client)
+    info = await client.get_collection(settings.qdrant_collection)
+    changes = collection_drift(info, settings)
+    if not changes:
+        return []
+    await client.update_collection(
+        collection_name=settings.qdrant_collection,
+        vectors_config={"": qm.VectorParamsDiff(on_disk=settings.qdrant_vectors_on_disk)},
+        hnsw_config=hnsw_config(settings),
+        quantization_config=quantization_config(settings) or qm.Disabled.DISABLED,
+        collection_params=qm.CollectionParamsDiff(on_disk_payload=settings.qdrant_payload_on_disk),
+    )
+    return changes
+
+
+async def bootstrap_qdrant() -> None:
+    """Verify the collection once at startup; retried lazily on first use if Qdrant is down."""
+    try:
+        await ensure_collection()
+    except RuntimeError:
+        raise
+    except Exception as exc:
+        logger.warning("Qdrant bootstrap failed, will retry on first use: %s", exc)
+
+
+async def search_points(
+    vector: np.ndarray,
+    *,
+    limit: int,
+    query_filter: qm.Filter | None = None,
+) -> list[qm.ScoredPoint]:
+    settings = get_settings()
+    client = get_qdrant_client()
+    await ensure_collection(client)
+    resp = await client.query_points(
+        collection_name=settings.qdrant_collection,
+        query=vector,
+        query_filter=query_filter,
+        search_params=search_params(settings),
+        limit=limit,
+        with_payload=True,
+        with_vectors=False,
+    )
+    return list(resp.points)
+
+
+async def upsert_vectors(
+    ids: list[str],
+    vectors: np.ndarray,
+    payloads: list[dict],
+    *,
+    wait: bool = True,
+) -> None:
+    if not ids:
         return
+    settings = get_settings()
+    client = get_qdrant_client()
+    await ensure_collection(client)
+    await client.upsert(
+        collection_name=settings.qdrant_collection,
+        points=qm.Batch(ids=ids, vectors=vectors, payloads=payloads),
+        wait=wait,
+    )
+
+
+async def set_point_payloads(updates: list[tuple[str, dict]], *, wait: bool = True) -> int:
+    """Merge payload fields into existing points; ids missing from the collection are skipped."""
+    if not updates:
+        return 0
+    settings = get_settings()
+    client = get_qdrant_client()
+    await ensure_collection(client)
+    found = await client.retrieve(
+        collection_name=settings.qdrant_collection,
+        ids=[point_id for point_id, _ in updates],
+        with_payload=False,
+        with_vectors=False,
+    )
+    existing = {str(p.id) for p in found}
+    ops = [
+        qm.SetPayloadOperation(set_payload=qm.SetPayload(payload=payload, points=[point_id]))
+        for point_id, payload in updates
+        if point_id in existing
+    ]
+    if ops:
+        await client.batch_update_points(collection_name=settings.qdrant_collection, update_operations=ops, wait=wait)
+    return len(ops)
 
-    client.create_collection(
-        collection_name=name,
-        vectors_config=qm.VectorParams(size=settings.embedding_dim, distance=qm.Distance.COSINE),
+
+async def delete_payload_key(key: str, *, wait: bool = True) -> None:
+    settings = get_settings()
+    client = get_qdrant_client()
+    await ensure_collection(client)
+    await client.delete_payload(
+        collection_name=settings.qdrant_collection,
+        keys=[key],
+        points=qm.FilterSelector(filter=qm.Filter(must=[])),
+        wait=wait,
+    )
+
+
+async def delete_document_points(document_id: str, *, wait: bool = True) -> None:
+    settings = get_settings()
+    client = get_qdrant_client()
+    await ensure_collection(client)
+    await client.delete(
+        collection_name=settings.qdrant_collection,
+        points_selector=qm.FilterSelector(
+            filter=qm.Filter(must=[qm.FieldCondition(key="document_id", match=qm.MatchValue(value=document_id))])
+        ),
+        wait=wait,
     )
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Protocol
+
+from app.core.config import get_settings
+from app.rag.lexical import lexical_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker(Protocol):
+    name: str
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        """Relevance of each text to `query`, higher is better. Runs on the rerank thread pool."""
+        ...
+
+
+class HeuristicReranker:
+    """
+    Cheap lexical scorer: share of distinct query terms (CJK bigrams, words, codes) found in
+    the chunk, with a bonus when the whole query appears verbatim. Ties keep the first-stage
+    order because the sort in the retriever is stable.
+    """
+
+    name = "heuristic"
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        terms = set(lexical_tokens(query))
+        needle = query.strip().lower()
+        scores: list[float] = []
+        for text in texts:
+            chunk_terms = set(lexical_tokens(text))
+            coverage = len(terms & chunk_terms) / len(terms) if terms else 0.0
+            exact = 0.5 if needle and needle in text.lower() else 0.0
+            scores.append(coverage + exact)
+        return scores
+
+
+class CrossEncoderReranker:
+    """Local cross-encoder (sentence-transformers), CPU by default."""
+
+    name = "cross_encoder"
+
+    def __init__(self, model_name: str, *, device: str | None = None) -> None:
+        from sentence_transformers import CrossEncoder
+
+        self._model = CrossEncoder(model_name, device=device)
+
+    def score(self, query: str, texts: list[str]) -> list[float]:
+        return [float(s) for s in self._model.predict([(query, t) for t in texts], batch_size=len(texts))]
+
+
+def _build_reranker(provider: str, model: str, device: str | None) -> Reranker:
+    if provider == "heuristic":
+        return HeuristicReranker()
+    try:
+        return CrossEncoderReranker(model, device=device)
+    except ImportError:
+        logger.warning(
+            "RERANK_PROVIDER=cross_encoder but 'sentence-transformers' is not installed; using the heuristic reranker"
+        )
+        return HeuristicReranker()
+
+
+class RerankPool:
+    """
+    The configured reranker plus a small dedicated thread pool for its scoring calls.
+
+    The model is loaded on that pool at startup, off the event loop; requests are not
+    reranked until it is ready. A scoring thread cannot be interrupted, so a call that
+    outlives its budget keeps its thread until it finishes; once `max_pending` calls are
+    running or queued, `submit` refuses new work instead of letting them pile up.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="rerank")
+        self._max_pending = max(1, max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._loading: asyncio.Task[None] | None = None
+        self.reranker: Reranker | None = None
+
+    def start(self, provider: str, model: str, device: str | None) -> None:
+        self._loading = asyncio.create_task(self._load(provider, model, device), name="reranker-load")
+
+    async def _load(self, provider: str, model: str, device: str | None) -> None:
+        try:
+            self.reranker = await asyncio.wrap_future(self._executor.submit(_build_reranker, provider, model, device))
+        except Exception:
+            logger.exception("Failed to load the %s reranker; reranking is disabled", provider)
+            return
+        logger.info("Reranker ready: %s", self.reranker.name)
+
+    def submit(self, query: str, texts: list[str]) -> asyncio.Future[list[float]] | None:
+        """Score `texts` on the pool, or return None when it is saturated."""
+        if self.reranker is None:
+            return None
+        with self._lock:
+            if self._pending >= self._max_pending:
+                return None
+            self._pending += 1
+        future = self._executor.submit(self.reranker.score, query, texts)
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def stop(self) -> None:
+        if self._loading is not None:
+            self._loading.cancel()
+            await asyncio.gather(self._loading, return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: RerankPool | None = None
+
+
+def start_reranker() -> None:
+    global _pool
+    settings = get_settings()
+    provider = (settings.rerank_provider or "none").lower()
+    if _pool is not None or provider == "none":
+        return
+    if provider not in {"heuristic", "cross_encoder"}:
+        raise RuntimeError(f"Unsupported rerank provider: {settings.rerank_provider}")
+    _pool = RerankPool(workers=settings.rerank_workers, max_pending=settings.rerank_max_pending)
+    _pool.start(provider, settings.rerank_model, settings.rerank_device or None)
+
+
+async def stop_reranker() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.stop()
+
+
+def get_rerank_pool() -> RerankPool | None:
+    """The started pool once its reranker has loaded, else None (no reranking)."""
+    if _pool is None or _pool.reranker is None:
+        return None
+    return _pool
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
+import numpy as np
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import get_settings
 from app.models.chunk import Chunk
 from app.models.document import Document
+from app.rag.chunk_cache import get_chunk_cache
 from app.rag.embeddings import embed_text
-from app.rag.qdrant_store import ensure_collection, get_qdrant_client
+from app.rag.filters import RetrievalFilter, document_conditions, qdrant_filter
+from app.rag.lexical import get_lexical_index
+from app.rag.qdrant_store import search_points
+from app.rag.reranker import RerankPool, get_rerank_pool
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(frozen=True)
@@ -21,70 +31,148 @@ class RetrievedChunk:
     version: str | None
     source_url: str | None
     chunk_index: int
-    score: float
+    # Vector similarity, shown with citations; None for a hit only the lexical index found.
+    score: float | None
     text: str
+    # What the results are ordered by when that is not `score`: the fused RRF or reranker score.
+    rank_score: float | None = None
 
 
-async def retrieve_chunks(db: AsyncSession, *, query: str, top_k: int | None = None) -> list[RetrievedChunk]:
-    settings = get_settings()
-    k = top_k or settings.rag_top_k
+def fuse_rrf(
+    rankings: list[tuple[list[tuple[uuid.UUID, float]], float]],
+    *,
+    k: int,
+    limit: int,
+) -> list[tuple[uuid.UUID, float]]:
+    """Weighted reciprocal rank fusion: sum of weight / (k + rank) over the ranked lists."""
+    fused: dict[uuid.UUID, float] = {}
+    for ranked, weight in rankings:
+        if weight <= 0:
+            continue
+        for rank, (cid, _) in enumerate(ranked, start=1):
+            fused[cid] = fused.get(cid, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)[:limit]
+
 
-    client = get_qdrant_client()
-    ensure_collection(client)
+def _chunk_from_payload(cid: uuid.UUID, score: float, payload: dict) -> RetrievedChunk | None:
+    """Build a result from the point payload alone when it carries the chunk text."""
+    text = payload.get("text")
+    if not isinstance(text, str):
+        return None
+    try:
+        document_id = uuid.UUID(str(payload["document_id"]))
+        chunk_index = int(payload.get("chunk_index") or 0)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return RetrievedChunk(
+        chunk_id=cid,
+        document_id=document_id,
+        title=str(payload.get("title") or ""),
+        version=payload.get("version"),
+        source_url=payload.get("source_url"),
+        chunk_index=chunk_index,
+        score=score,
+        text=text,
+    )
 
-    vec = await embed_text(query, dim=settings.embedding_dim)
 
-    if hasattr(client, "query_points"):
-        resp = client.query_points(
-            collection_name=settings.qdrant_collection,
-            query=vec,
-            limit=k,
-            with_payload=True,
-            with_vectors=False,
-        )
-        points = list(resp.points)
-    else:
-        points = client.search(  # type: ignore[attr-defined]
-            collection_name=settings.qdrant_collection,
-            query_vector=vec,
-            limit=k,
-            with_payload=True,
-        )
+async def _vector_search(
+    query: str,
+    *,
+    limit: int,
+    query_vector: np.ndarray | None,
+    filters: RetrievalFilter | None = None,
+) -> tuple[list[tuple[uuid.UUID, float]], dict[uuid.UUID, RetrievedChunk]]:
+    """Ranked (chunk id, score) pairs, plus the hits that could be built from payload text."""
+    settings = get_settings()
+    vec = query_vector if query_vector is not None else await embed_text(query, dim=settings.embedding_dim)
+    points = await search_points(vec, limit=limit, query_filter=qdrant_filter(filters))
 
     scored: list[tuple[uuid.UUID, float]] = []
+    known: dict[uuid.UUID, RetrievedChunk] = {}
     for p in points:
         payload = p.payload or {}
         try:
             cid = uuid.UUID(str(payload.get("chunk_id") or p.id))
         except Exception:
             continue
-        scored.append((cid, float(p.score or 0.0)))
+        score = float(p.score or 0.0)
+        scored.append((cid, score))
+        item = _chunk_from_payload(cid, score, payload)
+        if item is not None:
+            known[cid] = item
+    return scored, known
+
 
+async def _filter_hits(
+    db: AsyncSession,
+    hits: list[tuple[uuid.UUID, float]],
+    filters: RetrievalFilter | None,
+) -> list[tuple[uuid.UUID, float]]:
+    """Drop hits whose document does not match `filters` (the BM25 index has no metadata)."""
+    if not filters or not hits:
+        return hits
+    result = await db.execute(
+        select(Chunk.id)
+        .join(Document, Chunk.document_id == Document.id)
+        .where(Chunk.id.in_([cid for cid, _ in hits]), *document_conditions(filters))
+    )
+    allowed = set(result.scalars().all())
+    return [(cid, score) for cid, score in hits if cid in allowed]
+
+
+async def _hydrate(
+    db: AsyncSession,
+    scored: list[tuple[uuid.UUID, float]],
+    known: dict[uuid.UUID, RetrievedChunk] | None = None,
+    *,
+    similarity: dict[uuid.UUID, float] | None = None,
+) -> list[RetrievedChunk]:
+    """
+    Order results as `scored`. Chunks not in `known` (built from payloads) come from the
+    chunk cache, and the remaining misses from Postgres in one batched query. When `scored`
+    holds fused scores, pass the vector scores as `similarity`; the fused ones become rank_score.
+    """
     if not scored:
         return []
 
-    chunk_ids = [cid for cid, _ in scored]
+    known = known or {}
     score_map = {cid: s for cid, s in scored}
 
-    result = await db.execute(
-        select(Chunk, Document)
-        .join(Document, Chunk.document_id == Document.id)
-        .where(Chunk.id.in_(chunk_ids))
-    )
-    rows = result.all()
-
-    by_id: dict[uuid.UUID, RetrievedChunk] = {}
-    for chunk, doc in rows:
-        by_id[chunk.id] = RetrievedChunk(
-            chunk_id=chunk.id,
-            document_id=doc.id,
-            title=doc.title,
-            version=doc.version,
-            source_url=doc.source_url,
-            chunk_index=chunk.chunk_index,
-            score=score_map.get(chunk.id, 0.0),
-            text=chunk.text,
+    def _scored(item: RetrievedChunk) -> RetrievedChunk:
+        if similarity is None:
+            return replace(item, score=score_map[item.chunk_id], rank_score=None)
+        return replace(item, score=similarity.get(item.chunk_id), rank_score=score_map[item.chunk_id])
+
+    by_id = {cid: _scored(item) for cid, item in known.items() if cid in score_map}
+
+    missing = [cid for cid, _ in scored if cid not in by_id]
+    cache = get_chunk_cache()
+    if cache is not None and missing:
+        for cid, item in cache.get_many(missing).items():
+            by_id[cid] = _scored(item)
+        missing = [cid for cid in missing if cid not in by_id]
+
+    if missing:
+        result = await db.execute(
+            select(Chunk, Document)
+            .join(Document, Chunk.document_id == Document.id)
+            .where(Chunk.id.in_(missing))
         )
+        for chunk, doc in result.all():
+            item = RetrievedChunk(
+                chunk_id=chunk.id,
+                document_id=doc.id,
+                title=doc.title,
+                version=doc.version,
+                source_url=doc.source_url,
+                chunk_index=chunk.chunk_index,
+                score=None,
+                text=chunk.text,
+            )
+            by_id[chunk.id] = _scored(item)
+        if cache is not None:
+            cache.put_many(by_id[cid] for cid in missing if cid in by_id)
 
     ordered: list[RetrievedChunk] = []
     for cid, _ in scored:
@@ -94,6 +182,125 @@ async def retrieve_chunks(db: AsyncSession, *, query: str, top_k: int | None = N
     return ordered
 
 
+async def _first_stage(
+    db: AsyncSession,
+    *,
+    query: str,
+    limit: int,
+    query_vector: np.ndarray | None,
+    mode: str,
+    vector_weight: float | None,
+    lexical_weight: float | None,
+    filters: RetrievalFilter | None,
+) -> list[RetrievedChunk]:
+    settings = get_settings()
+    index = get_lexical_index() if mode == "hybrid" else None
+    if index is None or not index.ready:
+        vector_hits, known = await _vector_search(query, limit=limit, query_vector=query_vector, filters=filters)
+        return await _hydrate(db, vector_hits, known)
+
+    fetch = max(limit, settings.rag_top_k * settings.rag_hybrid_fetch_factor)
+    # Lexical hits are filtered after the fact, so overfetch them once more when narrowed.
+    lexical_fetch = fetch * settings.rag_hybrid_fetch_factor if filters else fetch
+    (vector_hits, known), lexical_hits = await asyncio.gather(
+        _vector_search(query, limit=fetch, query_vector=query_vector, filters=filters),
+        asyncio.to_thread(index.search, query, limit=lexical_fetch),
+    )
+    lexical_hits = (await _filter_hits(db, lexical_hits, filters))[:fetch]
+    fused = fuse_rrf(
+        [
+            (vector_hits, settings.rag_vector_weight if vector_weight is None else vector_weight),
+            (lexical_hits, settings.rag_lexical_weight if lexical_weight is None else lexical_weight),
+        ],
+        k=settings.rag_rrf_k,
+        limit=limit,
+    )
+    return await _hydrate(db, fused, known, similarity=dict(vector_hits))
+
+
+async def rerank_chunks(
+    pool: RerankPool,
+    query: str,
+    candidates: list[RetrievedChunk],
+    *,
+    top_k: int,
+) -> list[RetrievedChunk]:
+    """
+    Rescore `candidates` in batches within RERANK_BUDGET_MS. On timeout, scorer failure or a
+    saturated rerank pool the first-stage order is kept, so reranking can only cost its
+    budget, never fail a request.
+    """
+    settings = get_settings()
+    deadline = time.monotonic() + settings.rerank_budget_ms / 1000
+    batch_size = max(1, settings.rerank_batch_size)
+    scores: list[float] = []
+    try:
+        for start in range(0, len(candidates), batch_size):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            texts = [c.text for c in candidates[start : start + batch_size]]
+            future = pool.submit(query, texts)
+            if future is None:
+                logger.debug("Rerank pool saturated; using first-stage order")
+                return candidates[:top_k]
+            scores.extend(await asyncio.wait_for(future, remaining))
+    except asyncio.TimeoutError:
+        logger.warning("Reranking exceeded %d ms budget; using first-stage order", settings.rerank_budget_ms)
+        return candidates[:top_k]
+    except Exception:
+        logger.exception("Reranker %s failed; using first-stage order", pool.reranker.name)
+        return candidates[:top_k]
+
+    order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+    return [replace(candidates[i], rank_score=scores[i]) for i in order[:top_k]]
+
+
+async def retrieve_chunks(
+    db: AsyncSession,
+    *,
+    query: str,
+    top_k: int | None = None,
+    query_vector: np.ndarray | None = None,
+    mode: str | None = None,
+    vector_weight: float | None = None,
+    lexical_weight: float | None = None,
+    filters: RetrievalFilter | None = None,
+    rerank: bool = True,
+) -> list[RetrievedChunk]:
+    """
+    Retrieve the top chunks for `query`.
+
+    In "hybrid" mode the BM25 index and Qdrant are queried concurrently and fused with
+    weighted RRF; "vector" mode, or a lexical index that is disabled or still loading,
+    returns plain cosine-ranked results. With a reranker configured, RERANK_OVERFETCH x top_k
+    candidates are fetched and rescored. `score` always stays the vector similarity; a fused
+    or reranker score that ordered the results is in `rank_score`. `filters`
+    narrows both stages to matching documents (a Qdrant payload filter for vectors).
+    """
+    settings = get_settings()
+    k = top_k or settings.rag_top_k
+    mode = mode or settings.rag_retrieval_mode
+    if mode not in {"vector", "hybrid"}:
+        raise ValueError(f"Unknown retrieval mode: {mode}")
+
+    pool = get_rerank_pool() if rerank else None
+    limit = k * max(1, settings.rerank_overfetch) if pool else k
+    candidates = await _first_stage(
+        db,
+        query=query,
+        limit=limit,
+        query_vector=query_vector,
+        mode=mode,
+        vector_weight=vector_weight,
+        lexical_weight=lexical_weight,
+        filters=filters,
+    )
+    if pool is None or len(candidates) <= 1:
+        return candidates[:k]
+    return await rerank_chunks(pool, query, candidates, top_k=k)
+
+
 def build_context(chunks: list[RetrievedChunk], *, max_chars: int = 6000) -> str:
     parts: list[str] = []
     used = 0
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Callable
+from functools import lru_cache
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# CJK ideographs/kana/hangul run about one token per character in BPE vocabularies
+# (cl100k and most Chinese-aware embedders); Latin words average ~4 chars per token and
+# digit runs ~3 per token. Punctuation is one token each; whitespace is free.
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+_WORD_RE = re.compile(r"[A-Za-z]+")
+_DIGITS_RE = re.compile(r"\d+")
+_OTHER_RE = re.compile(r"[^\sA-Za-z\d\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count in linear time, without a tokenizer dependency."""
+    total = len(_CJK_RE.findall(text)) + len(_OTHER_RE.findall(text))
+    total += sum((len(w) + 3) // 4 for w in _WORD_RE.findall(text))
+    total += sum((len(d) + 2) // 3 for d in _DIGITS_RE.findall(text))
+    return total
+
+
+def _tiktoken_counter(encoding_name: str) -> TokenCounter | None:
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("CHUNK_TOKENIZER=tiktoken but the 'tiktoken' package is not installed; using the estimator")
+        return None
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode_ordinary(text))
+
+
+@lru_cache(maxsize=1)
+def get_token_counter() -> TokenCounter:
+    settings = get_settings()
+    if settings.chunk_tokenizer == "tiktoken":
+        counter = _tiktoken_counter(settings.chunk_tiktoken_encoding)
+        if counter is not None:
+            return counter
+    elif settings.chunk_tokenizer != "estimate":
+        raise RuntimeError(f"Unknown CHUNK_TOKENIZER: {settings.chunk_tokenizer}")
+    return estimate_tokens
@@ -1,15 +1,32 @@
 from __future__ import annotations
 
 import uuid
-from typing import Any
+from datetime import datetime
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
 
+class RetrievalOptions(BaseModel):
+    mode: Literal["vector", "hybrid"] | None = None
+    vector_weight: float | None = Field(default=None, ge=0)
+    lexical_weight: float | None = Field(default=None, ge=0)
+
+
+class RetrievalFilters(BaseModel):
+    document_ids: list[uuid.UUID] | None = Field(default=None, max_length=100)
+    versions: list[str] | None = Field(default=None, max_length=50)
+    source_types: list[str] | None = Field(default=None, max_length=20)
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
 class ChatAskRequest(BaseModel):
     question: str = Field(min_length=1, max_length=4000)
     session_id: uuid.UUID | None = None
     client_msg_id: str | None = Field(default=None, max_length=64)
+    retrieval: RetrievalOptions | None = None
+    filters: RetrievalFilters | None = None
 
 
 class Citation(BaseModel):
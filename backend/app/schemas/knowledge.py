@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import uuid
+from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class KnowledgeImportRequest(BaseModel):
@@ -13,9 +14,31 @@ class KnowledgeImportRequest(BaseModel):
     raw_text: str = Field(min_length=1, max_length=2_000_000)
 
 
-class KnowledgeImportResponse(BaseModel):
-    document_id: uuid.UUID
+class KnowledgeBulkImportResponse(BaseModel):
+    received: int
+    imported: int
+    skipped_duplicates: int
+    failed: int
     chunk_count: int
+    errors: list[str] = []
+
+
+class IngestionJobResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    status: str
+    stage: str
+    title: str
+    document_id: uuid.UUID | None
+    total_chunks: int | None
+    processed_chunks: int
+    attempts: int
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    chunks_per_sec: float | None = None
 
 
 class KnowledgeSearchItem(BaseModel):
@@ -25,10 +48,27 @@ class KnowledgeSearchItem(BaseModel):
     version: str | None
     source_url: str | None
     chunk_index: int
-    score: float
+    score: float | None
     text: str
+    rank_score: float | None = None
 
 
 class KnowledgeSearchResponse(BaseModel):
     items: list[KnowledgeSearchItem]
 
+
+class CacheStats(BaseModel):
+    size: int
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int = 0
+    shared_hits: int = 0
+    bytes: int = 0
+
+
+class KnowledgeCacheStatsResponse(BaseModel):
+    embedding: CacheStats | None = None
+    answer: CacheStats | None = None
+    chunk: CacheStats | None = None
+    auth_user: CacheStats | None = None
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.config import get_settings
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    qa_run_id: uuid.UUID
+    answer: str
+    citations: list[dict]
+
+
+@dataclass
+class _Entry:
+    vector: np.ndarray  # unit length, float32
+    answer: CachedAnswer
+    expires_at: float
+
+
+@dataclass
+class _Bucket:
+    entries: list[_Entry] = field(default_factory=list)
+
+
+def _unit(vec: np.ndarray) -> np.ndarray:
+    out = np.array(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(out))
+    if norm:
+        out /= norm
+    return out
+
+
+class AnswerCache:
+    """
+    Semantic cache of generated answers.
+
+    Entries are bucketed by (retrieved chunk id set, prompt version, LLM identity); within a
+    bucket a cached answer is reused when the query embedding is at least `similarity` cosine
+    close. Any knowledge base change in this process clears the cache; in other workers the
+    chunk id set in the key keeps stale answers from matching once retrieval changes.
+    """
+
+    def __init__(self, *, max_entries: int, ttl_sec: float, similarity: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_sec = ttl_sec
+        self._similarity = similarity
+        self._buckets: OrderedDict[tuple, _Bucket] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def signature(*, chunk_ids: list[uuid.UUID], prompt_version: str, llm_key: str) -> tuple:
+        return (frozenset(chunk_ids), prompt_version, llm_key)
+
+    def lookup(self, vector: np.ndarray, *, signature: tuple) -> CachedAnswer | None:
+        bucket = self._buckets.get(signature)
+        if bucket is not None:
+            now = time.time()
+            live = [e for e in bucket.entries if e.expires_at > now]
+            self._size -= len(bucket.entries) - len(live)
+            bucket.entries = live
+
+            if not live:
+                del self._buckets[signature]
+            else:
+                scores = np.stack([e.vector for e in live]) @ _unit(vector)
+                best = int(np.argmax(scores))
+                if scores[best] >= self._similarity:
+                    self._buckets.move_to_end(signature)
+                    self.hits += 1
+                    return live[best].answer
+
+        self.misses += 1
+        return None
+
+    def store(self, vector: np.ndarray, *, signature: tuple, answer: CachedAnswer) -> None:
+        bucket = self._buckets.get(signature)
+        if bucket is None:
+            bucket = _Bucket()
+            self._buckets[signature] = bucket
+        self._buckets.move_to_end(signature)
+        bucket.entries.append(
+            _Entry(vector=_unit(vector), answer=answer, expires_at=time.time() + self._ttl_sec)
+        )
+        self._size += 1
+
+        while self._size > self._max_entries and self._buckets:
+            _, oldest = next(iter(self._buckets.items()))
+            oldest.entries.pop(0)
+            self._size -= 1
+            self.evictions += 1
+            if not oldest.entries:
+                self._buckets.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self._buckets.clear()
+        self._size = 0
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> AnswerCache | None:
+    settings = get_settings()
+    if not settings.answer_cache_enabled:
+        return None
+    return AnswerCache(
+        max_entries=settings.answer_cache_max_entries,
+        ttl_sec=settings.answer_cache_ttl_sec,
+        similarity=settings.answer_cache_similarity,
+    )
+
+
+def invalidate_answer_cache() -> None:
+    cache = get_answer_cache()
+    if cache is not None:
+        cache.invalidate()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.document import Document
+from app.models.ingestion_job import IngestionJob
+from app.rag.chunking import ChunkItem
+from app.rag.indexing import IndexItem, chunk_payload, index_items
+from app.schemas.knowledge import KnowledgeImportRequest
+from app.services.chunk_store import chunk_rows, insert_chunks
+from app.services.cpu_pool import prepare_documents, run_cpu
+from app.services.ingestion import complete_indexed_jobs, requeue_jobs, touch_jobs
+
+
+@dataclass
+class BulkImportStats:
+    received: int = 0
+    imported: int = 0
+    skipped_duplicates: int = 0
+    failed: int = 0
+    chunk_count: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+class BulkImporter:
+    """
+    Imports documents in batches: one CPU-pool hand-off for hashing and chunking, one checksum
+    `IN` query, one multi-row document insert and one bulk chunk insert per batch. Embedding
+    of a committed batch overlaps with parsing and persisting the next one, and embedding
+    batches span document boundaries.
+
+    Each document is committed together with a running `IngestionJob` at the embedding
+    stage. The jobs are completed once their batch is indexed; if indexing fails, is
+    cancelled or the process dies, they are handed to the ingestion workers, which resume
+    from the committed chunks.
+    """
+
+    def __init__(
+        self, db: AsyncSession, *, batch_size: int, max_errors: int, created_by: uuid.UUID | None = None
+    ) -> None:
+        self._db = db
+        self._created_by = created_by
+        self._batch_size = max(1, batch_size)
+        self._max_errors = max_errors
+        self._pending: list[tuple[int, KnowledgeImportRequest]] = []
+        self._seen: set[str] = set()
+        self._indexing: asyncio.Task[int] | None = None
+        self._indexing_jobs: list[uuid.UUID] = []
+        self.stats = BulkImportStats()
+
+    def record_error(self, line_no: int, message: str) -> None:
+        self.stats.failed += 1
+        if len(self.stats.errors) < self._max_errors:
+            self.stats.errors.append(f"line {line_no}: {message}")
+
+    async def add(self, line_no: int, doc: KnowledgeImportRequest) -> None:
+        self.stats.received += 1
+        self._pending.append((line_no, doc))
+        if len(self._pending) >= self._batch_size:
+            await self._flush()
+
+    async def finish(self) -> BulkImportStats:
+        await self._flush()
+        await self._await_indexing()
+        return self.stats
+
+    async def abort(self) -> None:
+        task, self._indexing = self._indexing, None
+        job_ids, self._indexing_jobs = self._indexing_jobs, []
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if job_ids:
+            await asyncio.shield(requeue_jobs(job_ids))
+
+    async def _await_indexing(self) -> None:
+        if self._indexing is None:
+            return
+        # On failure the task stays set, so abort() hands its jobs to the ingestion workers.
+        await self._indexing
+        self._indexing = None
+        job_ids, self._indexing_jobs = self._indexing_jobs, []
+        await complete_indexed_jobs(job_ids)
+
+    async def _flush(self) -> None:
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Normalizing, hashing and chunking the whole batch is one hand-off to the CPU pool.
+        prepared = await run_cpu(prepare_documents, [doc.raw_text for _, doc in batch])
+        candidates: list[tuple[int, KnowledgeImportRequest, str, list[ChunkItem]]] = []
+        for (line_no, doc), result in zip(batch, prepared):
+            if result is None:
+                self.record_error(line_no, "raw_text is empty")
+                continue
+            checksum, items = result
+            if checksum in self._seen:
+                self.stats.skipped_duplicates += 1
+                continue
+            self._seen.add(checksum)
+            candidates.append((line_no, doc, checksum, items))
+        if not candidates:
+            return
+
+        existing = await self._db.execute(
+            select(Document.checksum).where(Document.checksum.in_([c[2] for c in candidates]))
+        )
+        existing_checksums = set(existing.scalars().all())
+
+        created_at = datetime.now(timezone.utc)
+        doc_rows: list[dict] = []
+        rows: list[dict] = []
+        to_index: list[IndexItem] = []
+        for line_no, doc, checksum, items in candidates:
+            if checksum in existing_checksums:
+                self.stats.skipped_duplicates += 1
+                continue
+            if not items:
+                self.record_error(line_no, "No chunks generated")
+                continue
+
+            doc_id = uuid.uuid4()
+            title = doc.title.strip()
+            doc_rows.append(
+                {
+                    "id": doc_id,
+                    "source_type": doc.source_type,
+                    "source_url": doc.source_url,
+                    "title": title,
+                    "version": doc.version,
+                    "checksum": checksum,
+                    "created_at": created_at,
+                }
+            )
+            doc_chunks = chunk_rows(doc_id, items)
+            rows.extend(doc_chunks)
+            for row in doc_chunks:
+                to_index.append(
+                    IndexItem(
+                        point_id=str(row["id"]),
+                        text=row["text"],
+                        payload=chunk_payload(
+                            chunk_id=str(row["id"]),
+                            document_id=str(doc_id),
+                            title=title,
+                            version=doc.version,
+                            source_type=doc.source_type,
+                            source_url=doc.source_url,
+                            created_at=created_at,
+                            chunk_index=row["chunk_index"],
+                            text=row["text"],
+                        ),
+                    )
+                )
+
+        if not doc_rows:
+            return
+
+        # ON CONFLICT guards against a concurrent import of the same checksum.
+        inserted = await self._db.execute(
+            pg_insert(Document)
+            .values(doc_rows)
+            .on_conflict_do_nothing(index_elements=[Document.checksum])
+            .returning(Document.id)
+        )
+        inserted_ids = set(inserted.scalars().all())
+        if len(inserted_ids) != len(doc_rows):
+            self.stats.skipped_duplicates += len(doc_rows) - len(inserted_ids)
+            rows = [r for r in rows if r["document_id"] in inserted_ids]
+            to_index = [x for x in to_index if uuid.UUID(x.payload["document_id"]) in inserted_ids]
+
+        await insert_chunks(self._db, rows)
+        chunk_counts: dict[uuid.UUID, int] = {}
+        for row in rows:
+            chunk_counts[row["document_id"]] = chunk_counts.get(row["document_id"], 0) + 1
+        now = datetime.now(timezone.utc)
+        job_rows = [
+            {
+                "id": uuid.uuid4(),
+                "status": "running",
+                "stage": "embedding",
+                "source_type": d["source_type"],
+                "source_url": d["source_url"],
+                "title": d["title"],
+                "version": d["version"],
+                "checksum": d["checksum"],
+                "document_id": d["id"],
+                "created_by": self._created_by,
+                "total_chunks": chunk_counts[d["id"]],
+                "processed_chunks": 0,
+                "attempts": 1,
+                "started_at": now,
+            }
+            for d in doc_rows
+            if d["id"] in inserted_ids
+        ]
+        await self._db.execute(insert(IngestionJob), job_rows)
+        await self._db.commit()
+
+        self.stats.imported += len(inserted_ids)
+        self.stats.chunk_count += len(rows)
+
+        # Keep one batch indexing in the background while the caller keeps streaming.
+        await self._await_indexing()
+        job_ids = [j["id"] for j in job_rows]
+
+        async def _heartbeat(_done: int) -> None:
+            # Keeps the running jobs from being reclaimed as stale while this request indexes them.
+            await touch_jobs(job_ids)
+
+        self._indexing = asyncio.create_task(index_items(to_index, on_progress=_heartbeat))
+        self._indexing_jobs = job_ids
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import get_sessionmaker
+from app.models.message import Message
+from app.models.session import Session
+from app.rag.embeddings import embed_text
+from app.rag.retriever import RetrievedChunk, build_context, retrieve_chunks
+from app.schemas.chat import ChatAskRequest
+
+
+class SessionNotFound(LookupError):
+    pass
+
+
+class StageTimer:
+    """Wall time per pipeline stage in ms; overlapping stages are timed independently."""
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter()
+        self.timings: dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = int((time.perf_counter() - start) * 1000)
+
+    def mark(self, name: str) -> None:
+        """Record the time elapsed since the request started (e.g. first token)."""
+        self.timings[name] = int((time.perf_counter() - self._t0) * 1000)
+
+
+async def run_concurrently(*aws: Awaitable[Any]) -> list[Any]:
+    """
+    Like `asyncio.gather`, but the first failure cancels the other stages (and waits for
+    them) before it is raised, so no stage keeps using a session the caller is about to drop.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    return [task.result() for task in tasks]
+
+
+@dataclass
+class PreparedTurn:
+    session: Session
+    user_message: Message
+    query_vector: np.ndarray
+    retrieved: list[RetrievedChunk]
+    context: str | None
+    session_created: bool = False
+
+
+async def discard_question(session: Session, user_message: Message, *, session_created: bool) -> None:
+    """
+    Undo a committed question when its turn fails before an answer is recorded, so a failed
+    request leaves no orphan user message (or freshly created session) behind.
+    """
+    async with get_sessionmaker()() as db:
+        await db.execute(delete(Message).where(Message.id == user_message.id))
+        if session_created:
+            await db.execute(delete(Session).where(Session.id == session.id))
+        await db.commit()
+
+
+async def _persist_question(db: AsyncSession, *, user_id: uuid.UUID, payload: ChatAskRequest) -> tuple[Session, Message]:
+    if payload.session_id is None:
+        title = payload.question.strip()
+        session = Session(user_id=user_id, title=title[:50] if title else None)
+        db.add(session)
+        await db.flush()
+    else:
+        result = await db.execute(select(Session).where(Session.id == payload.session_id, Session.user_id == user_id))
+        session = result.scalar_one_or_none()
+        if session is None:
+            raise SessionNotFound(payload.session_id)
+
+    user_message = Message(
+        session_id=session.id,
+        role="user",
+        content=payload.question,
+        client_msg_id=payload.client_msg_id,
+    )
+    db.add(user_message)
+    await db.commit()
+    return session, user_message
+
+
+async def _retrieve(payload: ChatAskRequest, *, retrieval: dict, timer: StageTimer) -> tuple[np.ndarray, list[RetrievedChunk]]:
+    settings = get_settings()
+    with timer.stage("embed"):
+        query_vec = await embed_text(payload.question, dim=settings.embedding_dim)
+    with timer.stage("retrieve"):
+        # Own session: the request session is busy persisting the question meanwhile. It only
+        # checks out a connection if hydration actually has to query Postgres.
+        async with get_sessionmaker()() as db:
+            retrieved = await retrieve_chunks(
+                db,
+                query=payload.question,
+                top_k=settings.rag_top_k,
+                query_vector=query_vec,
+                **retrieval,
+            )
+    return query_vec, retrieved
+
+
+async def prepare_turn(
+    db: AsyncSession,
+    *,
+    user_id: uuid.UUID,
+    payload: ChatAskRequest,
+    retrieval: dict,
+    timer: StageTimer,
+) -> PreparedTurn:
+    """
+    Everything before generation: session lookup/creation plus the user message, committed on
+    `db`, run concurrently with query embedding and retrieval.
+
+    Retrieval uses its own session. Committing the question releases the request's
+    connection, so a request never holds one connection while waiting for a second. The
+    price is that failures after this point must call `discard_question`; a retrieval
+    failure is undone here.
+
+    Raises SessionNotFound, or RuntimeError / httpx.HTTPError from retrieval.
+    """
+    persisted: tuple[Session, Message] | None = None
+
+    async def persist() -> tuple[Session, Message]:
+        nonlocal persisted
+        with timer.stage("persist_question"):
+            persisted = await _persist_question(db, user_id=user_id, payload=payload)
+        return persisted
+
+    try:
+        with timer.stage("prepare"):
+            (session, user_message), (query_vec, retrieved) = await run_concurrently(
+                persist(), _retrieve(payload, retrieval=retrieval, timer=timer)
+            )
+    except Exception:
+        if persisted is not None:
+            await discard_question(*persisted, session_created=payload.session_id is None)
+        raise
+    return PreparedTurn(
+        session=session,
+        user_message=user_message,
+        query_vector=query_vec,
+        retrieved=retrieved,
+        context=build_context(retrieved) if retrieved else None,
+        session_created=payload.session_id is None,
+    )
+
+
+def build_citations(retrieved: list[RetrievedChunk]) -> list[dict]:
+    return [
+        {
+            "chunk_id": str(c.chunk_id),
+            "document": {"title": c.title, "version": c.version, "source_url": c.source_url},
+            "snippet": c.text[:240],
+            "score": c.score,
+        }
+        for c in retrieved
+    ]
+
+
+def build_prompt(question: str, context: str | None) -> str | None:
+    if not context:
+        return None
+    return (
+        "你是医疗问答助手。回答需谨慎、避免诊断与处方，必要时建议就医。\n"
+        f"用户问题：{question}\n\n"
+        f"参考资料（带引用编号）：\n{context}\n"
+    )
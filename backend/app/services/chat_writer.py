@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import get_sessionmaker
+from app.models.message import Message
+from app.models.qa_run import QARun
+from app.models.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AnswerWrite:
+    """
+    The append-only tail of a chat turn: the assistant message, its QARun and the session's
+    updated_at. Rows carry client-side ids and created_at, so a turn written late still
+    sorts before the next question.
+    """
+
+    session_id: uuid.UUID
+    updated_at: datetime
+    assistant_message: dict
+    qa_run: dict
+    # True when the QARun row was inserted before streaming and only needs finalizing.
+    qa_run_exists: bool = False
+
+
+async def _write(db: AsyncSession, batch: list[AnswerWrite]) -> None:
+    await db.execute(insert(Message), [w.assistant_message for w in batch])
+    inserts = [w.qa_run for w in batch if not w.qa_run_exists]
+    if inserts:
+        await db.execute(insert(QARun), inserts)
+    updates = [w.qa_run for w in batch if w.qa_run_exists]
+    if updates:
+        await db.execute(update(QARun), updates)
+    latest: dict[uuid.UUID, datetime] = {}
+    for w in batch:
+        latest[w.session_id] = max(w.updated_at, latest.get(w.session_id, w.updated_at))
+    await db.execute(update(Session), [{"id": sid, "updated_at": ts} for sid, ts in latest.items()])
+
+
+async def _write_one(write: AnswerWrite) -> None:
+    async with get_sessionmaker()() as db:
+        await _write(db, [write])
+        await db.commit()
+
+
+class ChatWriter:
+    """
+    Write-behind queue for finished chat turns: one transaction per batch of up to
+    `batch_rows` turns, flushed at the latest `flush_ms` after its first turn arrived.
+
+    In "sync" mode callers wait for their batch to commit (group commit); in "async" mode
+    they return immediately and a crash can lose the turns still queued. A failed batch is
+    retried turn by turn so one bad row (e.g. a session deleted meanwhile) only drops itself.
+    """
+
+    def __init__(self, *, mode: str, batch_rows: int, flush_ms: int, max_pending: int) -> None:
+        self._wait = mode == "sync"
+        self._batch_rows = max(1, batch_rows)
+        self._flush_sec = max(0, flush_ms) / 1000
+        self._queue: asyncio.Queue[tuple[AnswerWrite, asyncio.Future[None] | None] | None] = asyncio.Queue(
+            maxsize=max(1, max_pending)
+        )
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="chat-writer")
+
+    async def submit(self, write: AnswerWrite) -> None:
+        fut = asyncio.get_running_loop().create_future() if self._wait else None
+        # Blocks when max_pending turns are queued, which pushes back on a stalled database.
+        await self._queue.put((write, fut))
+        if fut is not None:
+            await fut
+
+    async def stop(self) -> None:
+        """Flush everything queued so far, then stop."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await asyncio.shield(self._task)
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + self._flush_sec
+            while len(batch) < self._batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+        # Turns that were still waiting for queue space when stop() was called.
+        leftover: list[tuple[AnswerWrite, asyncio.Future[None] | None]] = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                leftover.append(item)
+        if leftover:
+            await self._flush(leftover)
+
+    async def _flush(self, batch: list[tuple[AnswerWrite, asyncio.Future[None] | None]]) -> None:
+        try:
+            async with get_sessionmaker()() as db:
+                await _write(db, [w for w, _ in batch])
+                await db.commit()
+        except Exception:
+            logger.exception("Chat write batch of %d failed; retrying one by one", len(batch))
+        else:
+            for _, fut in batch:
+                if fut is not None and not fut.done():
+                    fut.set_result(None)
+            return
+
+        for write, fut in batch:
+            try:
+                await _write_one(write)
+            except Exception as exc:
+                logger.error("Dropping chat turn for session %s: %s", write.session_id, exc)
+                if fut is not None and not fut.done():
+                    fut.set_exception(exc)
+            else:
+                if fut is not None and not fut.done():
+                    fut.set_result(None)
+
+
+_writer: ChatWriter | None = None
+
+
+def start_chat_writer() -> None:
+    global _writer
+    settings = get_settings()
+    if _writer is not None or settings.chat_write_mode == "direct":
+        return
+    if settings.chat_write_mode not in {"sync", "async"}:
+        raise RuntimeError(f"Unsupported CHAT_WRITE_MODE: {settings.chat_write_mode}")
+    _writer = ChatWriter(
+        mode=settings.chat_write_mode,
+        batch_rows=settings.chat_write_batch_rows,
+        flush_ms=settings.chat_write_flush_ms,
+        max_pending=settings.chat_write_max_pending,
+    )
+    _writer.start()
+
+
+async def stop_chat_writer() -> None:
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        await writer.stop()
+
+
+async def record_answer(write: AnswerWrite) -> None:
+    """Persist a finished turn through the writer, or in its own transaction when there is none."""
+    if _writer is None:
+        await _write_one(write)
+    else:
+        await _writer.submit(write)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterable, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models.chunk import Chunk
+from app.rag.chunking import ChunkItem
+
+_COPY_COLUMNS = ("id", "document_id", "chunk_index", "text", "token_count", "section")
+
+
+def chunk_rows(document_id: uuid.UUID, items: Iterable[ChunkItem]) -> list[dict]:
+    """Build chunk rows with client-generated ids, so no RETURNING round trip is needed."""
+    return [
+        {
+            "id": uuid.uuid4(),
+            "document_id": document_id,
+            "chunk_index": item.index,
+            "text": item.text,
+            "token_count": item.token_count,
+            "section": item.section,
+        }
+        for item in items
+    ]
+
+
+async def _copy_rows(db: AsyncSession, rows: Sequence[dict]) -> None:
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        Chunk.__tablename__,
+        records=[tuple(r[c] for c in _COPY_COLUMNS) for r in rows],
+        columns=list(_COPY_COLUMNS),
+    )
+
+
+async def insert_chunks(db: AsyncSession, rows: Sequence[dict], *, method: str | None = None) -> list[uuid.UUID]:
+    """
+    Insert chunk rows in bulk inside the session's transaction and return their ids.
+
+    Rows bypass the ORM unit of work: `insert` is one executemany of multi-row INSERTs,
+    `copy` streams them with asyncpg COPY. The caller commits.
+    """
+    if not rows:
+        return []
+    method = method or get_settings().chunk_insert_method
+    if method == "copy":
+        await _copy_rows(db, rows)
+    elif method == "insert":
+        await db.execute(insert(Chunk), list(rows))
+    else:
+        raise ValueError(f"Unknown chunk insert method: {method}")
+    return [r["id"] for r in rows]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import multiprocessing
+import signal
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import TypeVar
+
+from app.core.config import get_settings
+from app.rag.chunking import ChunkItem, chunk_document
+
+R = TypeVar("R")
+
+# Below this size hashing is cheaper than the round trip to a worker process.
+_INLINE_CHECKSUM_MAX_CHARS = 64 * 1024
+
+
+def _init_worker() -> None:
+    # Ctrl-C is handled by the server process, which shuts the pool down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class CPUPool:
+    """
+    Process pool for CPU-bound ingestion work, so it never runs on the event loop thread.
+
+    At most `max_pending` calls are submitted at once; further callers wait, which keeps
+    large imports from queueing unbounded amounts of pickled text in the executor.
+    """
+
+    def __init__(self, *, workers: int, max_pending: int) -> None:
+        # spawn: forking a process that already runs an event loop and threads is unsafe.
+        self._executor = ProcessPoolExecutor(
+            max_workers=max(1, workers),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        self._slots = asyncio.Semaphore(max(1, max_pending))
+
+    async def run(self, fn: Callable[..., R], /, *args, **kwargs) -> R:
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def shutdown(self) -> None:
+        await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+
+
+_pool: CPUPool | None = None
+
+
+def start_cpu_pool() -> None:
+    global _pool
+    settings = get_settings()
+    if _pool is not None or settings.cpu_pool_workers <= 0:
+        return
+    _pool = CPUPool(workers=settings.cpu_pool_workers, max_pending=settings.cpu_pool_max_pending)
+
+
+async def stop_cpu_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.shutdown()
+
+
+async def run_cpu(fn: Callable[..., R], /, *args, **kwargs) -> R:
+    """Run `fn` in the process pool, or in a worker thread when the pool is disabled."""
+    if _pool is None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return await _pool.run(fn, *args, **kwargs)
+
+
+def text_checksum(raw: str) -> str:
+    return hashlib.sha256(raw.encode("utf-8", errors="ignore")).hexdigest()
+
+
+async def compute_checksum(raw: str) -> str:
+    if len(raw) <= _INLINE_CHECKSUM_MAX_CHARS:
+        return text_checksum(raw)
+    return await run_cpu(text_checksum, raw)
+
+
+def prepare_documents(raw_texts: list[str]) -> list[tuple[str, list[ChunkItem]] | None]:
+    """Normalize, checksum and chunk a batch of documents; None for empty texts."""
+    out: list[tuple[str, list[ChunkItem]] | None] = []
+    for raw_text in raw_texts:
+        raw = raw_text.strip()
+        out.append((text_checksum(raw), chunk_document(raw)) if raw else None)
+    return out
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import importlib.util
+import logging
+
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPClientRegistry:
+    """
+    Process-wide pool of `httpx.AsyncClient` instances, one per (name, base_url).
+
+    Providers share keep-alive connections across requests instead of paying a
+    TCP/TLS handshake on every call. Created in the app lifespan and closed on shutdown.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry_sec: float,
+        http2: bool,
+    ) -> None:
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_sec,
+        )
+        self._http2 = http2
+        self._clients: dict[tuple[str, str], httpx.AsyncClient] = {}
+
+    def get(self, name: str, *, base_url: str, timeout: float) -> httpx.AsyncClient:
+        key = (name, base_url.rstrip("/"))
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=key[1],
+                timeout=timeout,
+                limits=self._limits,
+                http2=self._http2,
+            )
+            self._clients[key] = client
+        return client
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                logger.exception("Failed to close HTTP client")
+
+
+_registry: HTTPClientRegistry | None = None
+
+
+def _build_registry() -> HTTPClientRegistry:
+    settings = get_settings()
+    http2 = settings.http_http2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP_HTTP2 is enabled but the 'h2' package is not installed; falling back to HTTP/1.1")
+        http2 = False
+    return HTTPClientRegistry(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry_sec=settings.http_keepalive_expiry_sec,
+        http2=http2,
+    )
+
+
+def init_http_clients() -> HTTPClientRegistry:
+    global _registry
+    if _registry is None:
+        _registry = _build_registry()
+    return _registry
+
+
+async def close_http_clients() -> None:
+    global _registry
+    registry, _registry = _registry, None
+    if registry is not None:
+        await registry.aclose()
+
+
+def get_http_client(name: str, *, base_url: str, timeout: float) -> httpx.AsyncClient:
+    # Lazily initialised so scripts that do not run the FastAPI lifespan still work.
+    return init_http_clients().get(name, base_url=base_url, timeout=timeout)
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from sqlalchemy import Row, delete, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import get_settings
+from app.db.session import get_sessionmaker
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.models.ingestion_job import IngestionJob
+from app.rag.chunk_cache import invalidate_document_chunks
+from app.rag.chunking import chunk_document
+from app.rag.indexing import IndexItem, chunk_payload, index_items
+from app.rag.lexical import notify_lexical_index
+from app.rag.qdrant_store import delete_document_points
+from app.services.answer_cache import invalidate_answer_cache
+from app.services.chunk_store import chunk_rows, insert_chunks
+from app.services.cpu_pool import run_cpu
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_CHUNK_INSERT_BATCH = 1000
+_INDEX_PAGE_ROWS = 1000
+
+
+class JobFailed(Exception):
+    """Permanent failure: the job is marked failed without further retries."""
+
+
+async def _claim_next_job() -> uuid.UUID | None:
+    settings = get_settings()
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.ingestion_stale_after_sec)
+    async with get_sessionmaker()() as db:
+        result = await db.execute(
+            select(IngestionJob)
+            .where(
+                or_(
+                    IngestionJob.status == "queued",
+                    (IngestionJob.status == "running") & (IngestionJob.updated_at < stale_before),
+                )
+            )
+            .order_by(IngestionJob.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+        if job is None:
+            return None
+        if job.status == "running":
+            logger.warning("Reclaiming stale ingestion job %s", job.id)
+        job.status = "running"
+        job.attempts += 1
+        job.error = None
+        job.started_at = job.started_at or datetime.now(timezone.utc)
+        job.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        return job.id
+
+
+async def _update_job(job_id: uuid.UUID, **values) -> None:
+    values.setdefault("updated_at", datetime.now(timezone.utc))
+    async with get_sessionmaker()() as db:
+        await db.execute(update(IngestionJob).where(IngestionJob.id == job_id).values(**values))
+        await db.commit()
+
+
+async def touch_jobs(job_ids: list[uuid.UUID]) -> None:
+    async with get_sessionmaker()() as db:
+        await db.execute(
+            update(IngestionJob).where(IngestionJob.id.in_(job_ids)).values(updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+
+
+async def complete_indexed_jobs(job_ids: list[uuid.UUID]) -> None:
+    """Mark jobs whose chunks were indexed by their creator (the bulk importer) as succeeded."""
+    if not job_ids:
+        return
+    now = datetime.now(timezone.utc)
+    async with get_sessionmaker()() as db:
+        await db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id.in_(job_ids), IngestionJob.status == "running")
+            .values(
+                status="succeeded",
+                stage="done",
+                processed_chunks=IngestionJob.total_chunks,
+                finished_at=now,
+                updated_at=now,
+            )
+        )
+        await db.commit()
+
+
+async def requeue_jobs(job_ids: list[uuid.UUID]) -> None:
+    """Hand running jobs to the workers, which resume them from their committed chunks."""
+    async with get_sessionmaker()() as db:
+        await db.execute(
+            update(IngestionJob)
+            .where(IngestionJob.id.in_(job_ids), IngestionJob.status == "running")
+            .values(status="queued", updated_at=datetime.now(timezone.utc))
+        )
+        await db.commit()
+    notify_ingestion_workers()
+
+
+async def _persist_chunks(job_id: uuid.UUID) -> tuple[Document, int]:
+    """Chunk the raw text and store Document + Chunk rows, or reuse them when resuming."""
+    async with get_sessionmaker()() as db:
+        job = await db.get(IngestionJob, job_id)
+        if job is None:
+            raise JobFailed("Job disappeared")
+
+        if job.document_id is not None:
+            doc = await db.get(Document, job.document_id)
+            if doc is None:
+                raise JobFailed("Document of resumed job is missing")
+            return doc, job.total_chunks or 0
+
+        if not job.raw_text:
+            raise JobFailed("raw_text is empty")
+
+        doc = Document(
+            source_type=job.source_type,
+            source_url=job.source_url,
+            title=job.title,
+            version=job.version,
+            checksum=job.checksum,
+            # Set here rather than by the server default: it goes into every point payload.
+            created_at=datetime.now(timezone.utc),
+        )
+        db.add(doc)
+        try:
+            await db.flush()
+        except IntegrityError as exc:
+            raise JobFailed("Document already imported") from exc
+
+        # Chunking runs in the CPU pool; rows are built and written one batch at a time.
+        total = 0
+        chunks = iter(await run_cpu(chunk_document, job.raw_text))
+        while batch := list(islice(chunks, _CHUNK_INSERT_BATCH)):
+            await insert_chunks(db, chunk_rows(doc.id, batch))
+            total += len(batch)
+        if not total:
+            raise JobFailed("No chunks generated")
+
+        job.document_id = doc.id
+        job.total_chunks = total
+        job.stage = "embedding"
+        job.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+        return doc, total
+
+
+async def _index_document(job_id: uuid.UUID, doc: Document, *, skip: int) -> None:
+    """Index the document's chunks from `skip` on, reading them one keyset page at a time."""
+    done = skip
+    cursor: tuple[int, uuid.UUID] | None = None
+    while True:
+        stmt = (
+            select(Chunk.id, Chunk.chunk_index, Chunk.text)
+            .where(Chunk.document_id == doc.id)
+            .order_by(Chunk.chunk_index, Chunk.id)
+            .limit(_INDEX_PAGE_ROWS)
+        )
+        stmt = stmt.where(tuple_(Chunk.chunk_index, Chunk.id) > cursor) if cursor is not None else stmt.offset(skip)
+        async with get_sessionmaker()() as db:
+            rows = (await db.execute(stmt)).all()
+        if not rows:
+            return
+        await _index_page(job_id, doc, rows, done=done)
+        done += len(rows)
+        cursor = (rows[-1].chunk_index, rows[-1].id)
+
+
+async def _index_page(job_id: uuid.UUID, doc: Document, rows: list[Row], *, done: int) -> None:
+    to_index = (
+        IndexItem(
+            point_id=str(chunk_id),
+            text=text,
+            payload=chunk_payload(
+                chunk_id=str(chunk_id),
+                document_id=str(doc.id),
+                title=doc.title,
+                version=doc.version,
+                source_type=doc.source_type,
+                source_url=doc.source_url,
+                created_at=doc.created_at,
+                chunk_index=chunk_index,
+                text=text,
+            ),
+        )
+        for chunk_id, chunk_index, text in rows
+    )
+
+    async def _progress(n: int) -> None:
+        await _update_job(job_id, processed_chunks=done + n)
+
+    await index_items(to_index, on_progress=_progress)
+
+
+async def _discard_document(job_id: uuid.UUID) -> None:
+    """Drop the half-indexed Document of a failed job so the same text can be imported again."""
+    async with get_sessionmaker()() as db:
+        job = await db.get(IngestionJob, job_id)
+        document_id = job.document_id if job else None
+        if document_id is None:
+            return
+        # Points go first: if Qdrant fails nothing is deleted and the document stays visible.
+        try:
+            await delete_document_points(str(document_id))
+        except Exception:
+            logger.exception("Could not discard document %s of failed job %s", document_id, job_id)
+            return
+        job.document_id = None
+        await db.execute(delete(Chunk).where(Chunk.document_id == document_id))
+        await db.execute(delete(Document).where(Document.id == document_id))
+        await db.commit()
+    invalidate_document_chunks(document_id)
+    invalidate_answer_cache()
+    notify_lexical_index()
+
+
+async def run_job(job_id: uuid.UUID) -> None:
+    settings = get_settings()
+    try:
+        await _update_job(job_id, stage="chunking")
+        doc, total = await _persist_chunks(job_id)
+
+        async with get_sessionmaker()() as db:
+            job = await db.get(IngestionJob, job_id)
+            skip = job.processed_chunks if job else 0
+
+        await _update_job(job_id, stage="embedding")
+        await _index_document(job_id, doc, skip=skip)
+    except asyncio.CancelledError:
+        # Shutdown: hand the job back so another worker (or this one after restart) resumes it.
+        await asyncio.shield(_update_job(job_id, status="queued"))
+        raise
+    except Exception as exc:
+        async with get_sessionmaker()() as db:
+            job = await db.get(IngestionJob, job_id)
+            attempts = job.attempts if job else settings.ingestion_max_attempts
+        permanent = isinstance(exc, JobFailed) or attempts >= settings.ingestion_max_attempts
+        logger.warning("Ingestion job %s failed (attempt %d): %s", job_id, attempts, exc)
+        if permanent:
+            await _discard_document(job_id)
+        await _update_job(
+            job_id,
+            status="failed" if permanent else "queued",
+            error=str(exc),
+            finished_at=datetime.now(timezone.utc) if permanent else None,
+        )
+        return
+
+    await _update_job(
+        job_id,
+        status="succeeded",
+        stage="done",
+        processed_chunks=total,
+        raw_text=None,
+        finished_at=datetime.now(timezone.utc),
+    )
+    invalidate_answer_cache()
+    notify_lexical_index()
+
+
+class IngestionWorkerPool:
+    def __init__(self, *, concurrency: int, poll_interval_sec: float) -> None:
+        self._concurrency = max(1, concurrency)
+        self._poll_interval_sec = poll_interval_sec
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def start(self) -> None:
+        for i in range(self._concurrency):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"ingestion-worker-{i}"))
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                job_id = await _claim_next_job()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to claim ingestion job")
+                job_id = None
+
+            if job_id is not None:
+                try:
+                    await run_job(job_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # Bookkeeping failed (e.g. Postgres down); a job left running is reclaimed once stale.
+                    logger.exception("Ingestion job %s crashed", job_id)
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval_sec)
+            except asyncio.TimeoutError:
+                pass
+
+
+_pool: IngestionWorkerPool | None = None
+
+
+def start_ingestion_workers(*, concurrency: int | None = None) -> None:
+    """Start the claim loop; `concurrency` overrides INGESTION_WORKERS (e.g. for `app.cli ingest-worker`)."""
+    global _pool
+    settings = get_settings()
+    concurrency = settings.ingestion_workers if concurrency is None else concurrency
+    if _pool is not None or concurrency <= 0:
+        return
+    _pool = IngestionWorkerPool(
+        concurrency=concurrency,
+        poll_interval_sec=settings.ingestion_poll_interval_sec,
+    )
+    _pool.start()
+
+
+async def stop_ingestion_workers() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.stop()
+
+
+def notify_ingestion_workers() -> None:
+    if _pool is not None:
+        _pool.notify()
@@ -8,6 +8,7 @@ from typing import AsyncIterator
 import httpx
 
 from app.core.config import get_settings
+from app.services.http_clients import get_http_client
 
 
 @dataclass(frozen=True)
@@ -67,6 +68,9 @@ class OpenAICompatibleLLMClient(LLMClient):
         self._max_tokens = max_tokens
         self._temperature = temperature
 
+    def _client(self) -> httpx.AsyncClient:
+        return get_http_client("llm", base_url=self._base_url, timeout=self._timeout_sec)
+
     def _headers(self) -> dict[str, str]:
         headers = {"Content-Type": "application/json"}
         if self._api_key:
@@ -96,10 +100,9 @@ class OpenAICompatibleLLMClient(LLMClient):
             "stream": False,
         }
 
-        async with httpx.AsyncClient(base_url=self._base_url, timeout=self._timeout_sec) as client:
-            resp = await client.post("/chat/completions", headers=self._headers(), json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await self._client().post("/chat/completions", headers=self._headers(), json=payload)
+        resp.raise_for_status()
+        data = resp.json()
 
         text = (
             (((data.get("choices") or [])[0] or {}).get("message") or {}).get("content")
@@ -123,31 +126,30 @@ class OpenAICompatibleLLMClient(LLMClient):
             "stream": True,
         }
 
-        async with httpx.AsyncClient(base_url=self._base_url, timeout=self._timeout_sec) as client:
-            async with client.stream("POST", "/chat/completions", headers=self._headers(), json=payload) as resp:
-                resp.raise_for_status()
-                async for line in resp.aiter_lines():
-                    if not line:
-                        continue
-                    if line.startswith(":"):
-                        continue
-                    if not line.startswith("data:"):
-                        continue
-                    chunk = line[len("data:") :].strip()
-                    if not chunk or chunk == "[DONE]":
-                        if chunk == "[DONE]":
-                            break
-                        continue
-                    try:
-                        evt = json.loads(chunk)
-                    except Exception:
-                        continue
-                    choices = evt.get("choices") if isinstance(evt, dict) else None
-                    if not choices:
-                        continue
-                    delta = (choices[0].get("delta") or {}).get("content")
-                    if isinstance(delta, str) and delta:
-                        yield delta
+        async with self._client().stream("POST", "/chat/completions", headers=self._headers(), json=payload) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                if line.startswith(":"):
+                    continue
+                if not line.startswith("data:"):
+                    continue
+                chunk = line[len("data:") :].strip()
+                if not chunk or chunk == "[DONE]":
+                    if chunk == "[DONE]":
+                        break
+                    continue
+                try:
+                    evt = json.loads(chunk)
+                except Exception:
+                    continue
+                choices = evt.get("choices") if isinstance(evt, dict) else None
+                if not choices:
+                    continue
+                delta = (choices[0].get("delta") or {}).get("content")
+                if isinstance(delta, str) and delta:
+                    yield delta
 
 
 def get_llm_client() -> LLMClient:
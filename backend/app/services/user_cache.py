@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.core.config import get_settings
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    """The authenticated caller: a detached snapshot of the user row, safe to share across requests."""
+
+    id: uuid.UUID
+    username: str
+    role: str
+    token_epoch: int
+
+    @classmethod
+    def from_user(cls, user: User) -> AuthUser:
+        return cls(id=user.id, username=user.username, role=user.role, token_epoch=user.token_epoch)
+
+
+class UserCache:
+    """
+    LRU of authenticated users by id. An entry is dropped after `ttl_sec`, on logout-all in
+    this process, or when a token carries a newer epoch than the entry (revoked elsewhere).
+    """
+
+    def __init__(self, *, max_entries: int, ttl_sec: float) -> None:
+        self._max_entries = max(1, max_entries)
+        self._ttl_sec = ttl_sec
+        self._entries: OrderedDict[uuid.UUID, tuple[AuthUser, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id: uuid.UUID) -> AuthUser | None:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] <= time.monotonic():
+            del self._entries[user_id]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, user: AuthUser) -> None:
+        self._entries.pop(user.id, None)
+        self._entries[user.id] = (user, time.monotonic() + self._ttl_sec)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_user_cache() -> UserCache | None:
+    settings = get_settings()
+    if settings.auth_user_cache_ttl_sec <= 0:
+        return None
+    return UserCache(max_entries=settings.auth_user_cache_max_entries, ttl_sec=settings.auth_user_cache_ttl_sec)
+
+
+def invalidate_user(user_id: uuid.UUID) -> None:
+    cache = get_user_cache()
+    if cache is not None:
+        cache.invalidate(user_id)
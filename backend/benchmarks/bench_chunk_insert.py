@@ -0,0 +1,66 @@
+"""
+Compare chunk persistence strategies against the configured DATABASE_URL.
+
+    cd backend && python -m benchmarks.bench_chunk_insert --chunks 5000 --repeat 3
+
+Each run inserts a throwaway document plus N chunks inside a transaction that is rolled
+back, so the database is left untouched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.db.session import get_engine, get_sessionmaker
+from app.models.chunk import Chunk
+from app.models.document import Document
+from app.rag.chunking import ChunkItem
+from app.services.chunk_store import chunk_rows, insert_chunks
+
+
+def _items(n: int, size: int) -> list[ChunkItem]:
+    body = "患者主诉头痛三天，伴恶心。" * (size // 13 + 1)
+    return [ChunkItem(index=i, text=f"{i} {body[:size]}") for i in range(n)]
+
+
+async def _run(method: str, items: list[ChunkItem]) -> float:
+    async with get_sessionmaker()() as db:
+        doc = Document(source_type="bench", title="bench", checksum=uuid.uuid4().hex)
+        db.add(doc)
+        await db.flush()
+
+        start = time.perf_counter()
+        if method == "orm":
+            for item in items:
+                db.add(Chunk(document_id=doc.id, chunk_index=item.index, text=item.text))
+            await db.flush()
+        else:
+            await insert_chunks(db, chunk_rows(doc.id, items), method=method)
+        elapsed = time.perf_counter() - start
+        await db.rollback()
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--chunk-chars", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--methods", default="orm,insert,copy")
+    args = parser.parse_args()
+
+    items = _items(args.chunks, args.chunk_chars)
+    try:
+        await _run("insert", items[:10])  # warm up the pool and statement cache
+        for method in args.methods.split(","):
+            best = min([await _run(method, items) for _ in range(args.repeat)])
+            print(f"{method:>6}: {best * 1000:8.1f} ms  {args.chunks / best:10.0f} chunks/s")
+    finally:
+        await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Compare the streaming chunkers with the original list-based `chunk_text`.
+
+    cd backend && python -m benchmarks.bench_chunking --mb 4
+
+Reports wall time and peak traced memory per implementation (the file-stream cases
+exclude the source text itself), plus the time until the first chunk is available.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Iterator
+
+from app.rag.chunking import CharChunker, ChunkItem, LineChunker, SentenceChunker, _run, iter_lines
+
+
+def legacy_chunk_text(raw_text: str, *, max_chars: int = 1200, overlap_chars: int = 120) -> list[ChunkItem]:
+    """The pre-streaming implementation, kept verbatim as the baseline."""
+    text = raw_text.strip()
+    if not text:
+        return []
+
+    parts = [p.strip() for p in re.split(r"\n{2,}", text) if p.strip()]
+    merged: list[str] = []
+    buf = ""
+    for p in parts:
+        if not buf:
+            buf = p
+            continue
+        if len(buf) + 2 + len(p) <= max_chars:
+            buf = f"{buf}\n\n{p}"
+        else:
+            merged.append(buf)
+            buf = p
+    if buf:
+        merged.append(buf)
+
+    chunks: list[ChunkItem] = []
+    for i, m in enumerate(merged):
+        if len(m) <= max_chars:
+            chunks.append(ChunkItem(index=i, text=m))
+            continue
+
+        start = 0
+        piece_index = i
+        while start < len(m):
+            end = min(len(m), start + max_chars)
+            piece = m[start:end]
+            chunks.append(ChunkItem(index=piece_index, text=piece))
+            piece_index += 1
+            if end >= len(m):
+                break
+            start = max(0, end - overlap_chars)
+
+    return chunks
+
+
+def _document(mb: float) -> str:
+    paragraphs = [
+        "高血压患者应低盐饮食，每日食盐摄入量不超过5克。",
+        "## 药物治疗",
+        "Patients with stage 2 hypertension usually need two drugs. Review after 4 weeks.",
+        "若出现头痛、视物模糊等症状，应立即就医！" * 40,
+    ]
+    out: list[str] = []
+    size = 0
+    i = 0
+    while size < mb * 1024 * 1024:
+        p = paragraphs[i % len(paragraphs)]
+        out.append(p)
+        size += len(p.encode())
+        i += 1
+    return "\n\n".join(out)
+
+
+def _measure(name: str, run: Callable[[], Iterable[ChunkItem]]) -> list[str]:
+    start = time.perf_counter()
+    it = iter(run())
+    first = next(it, None)
+    first_at = time.perf_counter() - start
+    texts = [] if first is None else [first.text]
+    texts.extend(c.text for c in it)
+    elapsed = time.perf_counter() - start
+
+    # Peak memory is measured in a separate pass: tracemalloc slows allocation-heavy code a lot.
+    tracemalloc.start()
+    for _ in run():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:>22}: {elapsed * 1000:8.1f} ms  first chunk {first_at * 1000:7.1f} ms"
+        f"  peak {peak / 1024 / 1024:6.1f} MiB  chunks {len(texts)}"
+    )
+    return texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=4.0)
+    parser.add_argument("--max-tokens", type=int, default=512)
+    args = parser.parse_args()
+
+    text = _document(args.mb)
+    print(f"document: {len(text.encode()) / 1024 / 1024:.1f} MiB, {text.count(chr(10) * 2) + 1} paragraphs")
+
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt") as f:
+        f.write(text)
+        f.flush()
+
+        def from_file(chunker: LineChunker) -> Iterator[ChunkItem]:
+            with open(f.name, encoding="utf-8") as src:
+                yield from _run(chunker, iter_lines(src))
+
+        def sentence() -> SentenceChunker:
+            return SentenceChunker(max_tokens=args.max_tokens, overlap_tokens=64)
+
+        legacy = _measure("legacy chunk_text", lambda: legacy_chunk_text(text))
+        chars = _measure("chars (str)", lambda: _run(CharChunker(), iter_lines(text)))
+        _measure("chars (file stream)", lambda: from_file(CharChunker()))
+        _measure("sentence (str)", lambda: _run(sentence(), iter_lines(text)))
+        _measure("sentence (file stream)", lambda: from_file(sentence()))
+    print("chars output identical to legacy:", chars == legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Per-request database overhead: session setup, connection checkout and a small query.
+
+    cd backend && python -m benchmarks.bench_db_session --requests 2000 --concurrency 8
+
+Compares the previous per-request setup (a fresh sessionmaker per request, pre-ping on every
+checkout) with the cached sessionmaker and each knob of the tuned engine, against the
+configured DATABASE_URL. Every request looks up one user by primary key, like the auth
+dependency does. Also times JSON encoding of a citations payload with each serializer.
+Read-only; the database is left untouched.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import _json_codec, build_engine
+from app.models.user import User
+
+
+def _citations(n: int) -> list[dict]:
+    snippet = ("患者主诉头痛三天，伴恶心、畏光。建议监测血压并及时就医。" * 8)[:240]
+    return [
+        {
+            "chunk_id": str(uuid.uuid4()),
+            "document": {"title": "高血压诊疗指南", "version": "2024", "source_url": "https://example.org/guide"},
+            "snippet": snippet,
+            "score": 0.8123 - i * 0.01,
+        }
+        for i in range(n)
+    ]
+
+
+def _bench_json(rounds: int) -> None:
+    payload = _citations(8)
+    print(f"{'serializer':<12} {'us/payload':>10} {'bytes':>7}")
+    stock = lambda obj: json.dumps(obj)  # noqa: E731  (SQLAlchemy's default)
+    for name, dumps in (("default", stock), ("json", _json_codec("json")[0]), ("orjson", _json_codec("orjson")[0])):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            out = dumps(payload)
+        elapsed = (time.perf_counter() - start) / rounds * 1e6
+        print(f"{name:<12} {elapsed:10.1f} {len(out.encode()):7d}")
+
+
+async def _requests(
+    engine: AsyncEngine, user_id: uuid.UUID, *, n: int, concurrency: int, cached: bool
+) -> tuple[float, float, float]:
+    shared = async_sessionmaker(engine, expire_on_commit=False)
+    latencies: list[float] = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with sem:
+            start = time.perf_counter()
+            maker = shared if cached else async_sessionmaker(engine, expire_on_commit=False)
+            async with maker() as db:
+                await db.execute(select(User).where(User.id == user_id))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    wall = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(n)))
+    wall = time.perf_counter() - wall
+    latencies.sort()
+    return n / wall, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json-rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    _bench_json(args.json_rounds)
+
+    baseline = {"db_pool_pre_ping": True, "db_statement_cache_size": 100, "db_statement_timeout_ms": 0}
+    variants = [
+        ("before (new maker, pre-ping)", baseline, False),
+        ("cached maker", baseline, True),
+        ("cached, no pre-ping", {**baseline, "db_pool_pre_ping": False}, True),
+        ("cached, no pre-ping, no stmt cache", {**baseline, "db_pool_pre_ping": False, "db_statement_cache_size": 0}, True),
+        ("current settings", {}, True),
+    ]
+    print(f"\n{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'config':<38} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, update, cached in variants:
+        engine = build_engine(settings.model_copy(update=update))
+        try:
+            async with AsyncSession(engine) as db:
+                user_id = (await db.execute(select(User.id).limit(1))).scalar_one_or_none() or uuid.uuid4()
+            await _requests(engine, user_id, n=min(200, args.requests), concurrency=args.concurrency, cached=cached)
+            rps, p50, p95 = await _requests(engine, user_id, n=args.requests, concurrency=args.concurrency, cached=cached)
+            print(f"{label:<38} {rps:8.0f} {p50:8.2f} {p95:8.2f}")
+        finally:
+            await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,173 @@
+"""
+Recall and latency of Qdrant HNSW / quantization settings.
+
+    cd backend && python -m benchmarks.bench_qdrant_recall --points 100000 --queries 200 \
+        --quantization none,scalar,product --hnsw-ef 0,64,128,256
+
+Creates one throwaway collection per quantization mode on QDRANT_URL (HNSW and on-disk
+flags from settings or the command line), loads the same vectors into each and compares the
+top-k of every search configuration with exact neighbours computed in NumPy. Vectors are
+synthetic clustered unit vectors, or a sample of the live collection with --from-collection
+so recall reflects the real embedding distribution. The collections are dropped at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models as qm
+
+from app.core.config import Settings, get_settings
+from app.rag.qdrant_store import hnsw_config, quantization_config, search_params
+
+_UPSERT_BATCH = 1000
+
+
+def _synthetic(n: int, dim: int, *, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def _sample_collection(client: AsyncQdrantClient, name: str, n: int) -> np.ndarray:
+    out: list[list[float]] = []
+    offset = None
+    while len(out) < n:
+        points, offset = await client.scroll(
+            name, limit=min(1000, n - len(out)), offset=offset, with_payload=False, with_vectors=True
+        )
+        out.extend(p.vector for p in points)
+        if offset is None:
+            break
+    vectors = np.asarray(out, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _vector_ram_mib(settings: Settings, n: int, dim: int) -> float:
+    """Rough RAM for vectors: quantized codes when always_ram, plus originals unless on disk."""
+    raw = n * dim * 4
+    mode = settings.qdrant_quantization
+    quantized = {"none": 0, "scalar": n * dim, "product": raw // int(settings.qdrant_pq_compression[1:] or 1)}[mode]
+    total = (0 if settings.qdrant_vectors_on_disk else raw) + (quantized if settings.qdrant_quantization_always_ram else 0)
+    return total / 1024 / 1024
+
+
+async def _build(client: AsyncQdrantClient, name: str, settings: Settings, vectors: np.ndarray) -> float:
+    await client.create_collection(
+        collection_name=name,
+        vectors_config=qm.VectorParams(
+            size=vectors.shape[1], distance=qm.Distance.COSINE, on_disk=settings.qdrant_vectors_on_disk
+        ),
+        hnsw_config=hnsw_config(settings),
+        quantization_config=quantization_config(settings),
+        # Index every segment, so small benchmark sizes still exercise HNSW instead of a full scan.
+        optimizers_config=qm.OptimizersConfigDiff(indexing_threshold=1),
+    )
+    start = time.perf_counter()
+    for lo in range(0, len(vectors), _UPSERT_BATCH):
+        batch = vectors[lo : lo + _UPSERT_BATCH]
+        await client.upsert(name, points=qm.Batch(ids=list(range(lo, lo + len(batch))), vectors=batch), wait=True)
+    while (await client.get_collection(name)).status != qm.CollectionStatus.GREEN:
+        await asyncio.sleep(0.5)
+    return time.perf_counter() - start
+
+
+async def _measure(
+    client: AsyncQdrantClient,
+    name: str,
+    queries: np.ndarray,
+    truth: np.ndarray,
+    *,
+    top_k: int,
+    params: qm.SearchParams | None,
+) -> tuple[float, float, float]:
+    recalls: list[float] = []
+    latencies: list[float] = []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        resp = await client.query_points(name, query=query, limit=top_k, search_params=params, with_payload=False)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len({p.id for p in resp.points} & set(expected.tolist())) / top_k)
+    ms = np.asarray(latencies) * 1000
+    return float(np.mean(recalls)), float(np.percentile(ms, 50)), float(np.percentile(ms, 95))
+
+
+async def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=settings.qdrant_url, help="Qdrant URL, or :memory: for a dry run")
+    parser.add_argument("--points", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=settings.embedding_dim)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--from-collection", action="store_true", help=f"sample vectors from '{settings.qdrant_collection}'")
+    parser.add_argument("--quantization", default="none,scalar,product")
+    parser.add_argument("--hnsw-ef", default="0,64,128,256", help="search-time ef values; 0 = Qdrant default")
+    parser.add_argument("--m", type=int, default=settings.qdrant_hnsw_m)
+    parser.add_argument("--ef-construct", type=int, default=settings.qdrant_hnsw_ef_construct)
+    parser.add_argument("--pq-compression", default=settings.qdrant_pq_compression)
+    parser.add_argument("--oversampling", type=float, default=settings.qdrant_search_oversampling)
+    parser.add_argument("--vectors-on-disk", action="store_true", default=settings.qdrant_vectors_on_disk)
+    args = parser.parse_args()
+
+    client = AsyncQdrantClient(location=args.url, timeout=max(60, settings.qdrant_timeout_sec))
+    try:
+        if args.from_collection:
+            data = await _sample_collection(client, settings.qdrant_collection, args.points + args.queries)
+            rng = np.random.default_rng(0)
+            data = data[rng.permutation(len(data))]
+            queries, vectors = data[: args.queries], data[args.queries :]
+        else:
+            vectors = _synthetic(args.points, args.dim)
+            queries = _synthetic(args.queries, args.dim, seed=1)
+        truth = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.top_k]
+        print(f"{len(vectors)} points x {vectors.shape[1]} dims, {len(queries)} queries, recall@{args.top_k}")
+        print(f"{'config':<42} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8}")
+
+        for mode in args.quantization.split(","):
+            variant = settings.model_copy(
+                update={
+                    "qdrant_quantization": mode,
+                    "qdrant_hnsw_m": args.m,
+                    "qdrant_hnsw_ef_construct": args.ef_construct,
+                    "qdrant_pq_compression": args.pq_compression,
+                    "qdrant_search_oversampling": args.oversampling,
+                    "qdrant_vectors_on_disk": args.vectors_on_disk,
+                }
+            )
+            name = f"bench_{mode}_{uuid.uuid4().hex[:8]}"
+            try:
+                load_sec = await _build(client, name, variant, vectors)
+                print(
+                    f"-- {mode}: m={args.m} ef_construct={args.ef_construct}, loaded+indexed in {load_sec:.1f} s, "
+                    f"vector RAM ~{_vector_ram_mib(variant, len(vectors), vectors.shape[1]):.0f} MiB"
+                )
+                await _measure(client, name, queries[:10], truth[:10], top_k=args.top_k, params=None)  # warm up
+                exact = qm.SearchParams(exact=True)
+                recall, p50, p95 = await _measure(client, name, queries, truth, top_k=args.top_k, params=exact)
+                print(f"{'exact (full scan)':<42} {recall:7.3f} {p50:8.2f} {p95:8.2f}")
+                for ef in (int(x) for x in args.hnsw_ef.split(",")):
+                    rescores = (True, False) if mode != "none" else (True,)
+                    for rescore in rescores:
+                        params = search_params(
+                            variant.model_copy(update={"qdrant_search_hnsw_ef": ef, "qdrant_search_rescore": rescore})
+                        )
+                        label = f"hnsw_ef={ef or 'default'}" + (f" rescore={rescore}" if mode != "none" else "")
+                        recall, p50, p95 = await _measure(
+                            client, name, queries, truth, top_k=args.top_k, params=params
+                        )
+                        print(f"{label:<42} {recall:7.3f} {p50:8.2f} {p95:8.2f}")
+            finally:
+                await client.delete_collection(name)
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
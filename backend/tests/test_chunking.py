@@ -0,0 +1,32 @@
+from app.rag.chunking import chunk_sentences, detect_heading
+
+SYMPTOMS = """## 临床表现
+常见症状包括：
+1. 发热
+2、咳嗽
+3. 乏力
+4. 咽痛
+治疗以对症为主，注意休息并多饮水。
+"""
+
+
+def test_numbered_list_items_are_not_headings() -> None:
+    assert detect_heading("1. 发热") is None
+    assert detect_heading("2、咳嗽") is None
+    assert detect_heading("一、概述") == "一、概述"
+    assert detect_heading("## 临床表现") == "临床表现"
+
+
+def test_numbered_symptom_list_stays_in_its_section() -> None:
+    chunks = chunk_sentences(SYMPTOMS, max_tokens=512, overlap_tokens=0)
+
+    assert len(chunks) == 1
+    assert chunks[0].section == "临床表现"
+    assert "常见症状包括：\n1. 发热\n2、咳嗽\n3. 乏力\n4. 咽痛\n治疗以对症为主" in chunks[0].text
+
+
+def test_consecutive_headings_open_the_same_chunk() -> None:
+    chunks = chunk_sentences("# 感冒\n一、概述\n感冒是常见的上呼吸道感染。\n## 附录", max_tokens=512, overlap_tokens=0)
+
+    assert [c.text for c in chunks] == ["# 感冒\n一、概述\n\n感冒是常见的上呼吸道感染。"]
+    assert chunks[0].section == "一、概述"
@@ -8,7 +8,21 @@ export type KnowledgeImportRequest = {
   raw_text: string
 }
 
-export type KnowledgeImportResponse = { document_id: string; chunk_count: number }
+export type IngestionJob = {
+  id: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  stage: string
+  title: string
+  document_id: string | null
+  total_chunks: number | null
+  processed_chunks: number
+  attempts: number
+  error: string | null
+  created_at: string
+  started_at: string | null
+  finished_at: string | null
+  chunks_per_sec: number | null
+}
 
 export type KnowledgeSearchItem = {
   chunk_id: string
@@ -17,17 +31,23 @@ export type KnowledgeSearchItem = {
   version: string | null
   source_url: string | null
   chunk_index: number
-  score: number
+  score: number | null
   text: string
+  rank_score?: number | null
 }
 
 export type KnowledgeSearchResponse = { items: KnowledgeSearchItem[] }
 
-export async function apiKnowledgeImport(payload: KnowledgeImportRequest): Promise<KnowledgeImportResponse> {
+export async function apiKnowledgeImport(payload: KnowledgeImportRequest): Promise<IngestionJob> {
   const { data } = await apiClient.post('/api/knowledge/import', payload)
   return data
 }
 
+export async function apiKnowledgeJob(jobId: string): Promise<IngestionJob> {
+  const { data } = await apiClient.get(`/api/knowledge/jobs/${jobId}`)
+  return data
+}
+
 export async function apiKnowledgeSearch(q: string, topK = 5): Promise<KnowledgeSearchResponse> {
   const { data } = await apiClient.get('/api/knowledge/search', { params: { q, top_k: topK } })
   return data